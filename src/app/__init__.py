@@ -2,14 +2,23 @@
 
 import json
 import os
+import signal
 from importlib import import_module
 
-from flask import Flask, request
+from flask import Flask, jsonify, request
 from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.routing import PathConverter
 
+from core.bcrypt_pool import BcryptBusyError, bcrypt_pool
+from core.login_filter import create_login_index, login_filter
+from core.model_registry import model_registry
+from core.signed_session import create_revocation_table
+from core.sweeper import sweeper
+from core.unit_of_work import close_unit_of_work
+from utils.stats import collect_stats, install_stats_signal
 from utils.utils import merge_dict
 
+from .commands import register_commands
 from .config import Config
 from .components import Components
 from .extensions import cache, limiter
@@ -52,14 +61,60 @@ def create_app(config_class=Config, debug=False):
                     print(f"{view_func.__name__} - {request.path}")
             return response
 
+        @app.route('/_debug/stats')
+        def debug_stats():
+            return jsonify(collect_stats())
+
+    # Dump the runtime statistics on a signal, only from the main thread
+    if Config.STATS_SIGNAL and hasattr(signal, Config.STATS_SIGNAL):
+        try:
+            install_stats_signal(getattr(signal, Config.STATS_SIGNAL))
+        except ValueError:
+            pass
+
     # Register security headers
     app.after_request(add_security_headers)
 
+    # Password hashing overloaded, the client can retry
+    @app.errorhandler(BcryptBusyError)
+    def bcrypt_busy(_error):
+        return "Server busy, please try again later.", 503, {"Retry-After": "1"}
+
+    # Return the connections of the request to the pool, commit the batched writes
+    app.teardown_appcontext(close_unit_of_work)
+
     class AnyExtensionConverter(PathConverter):
         """Capture any path that contains a dot (like files with extension)."""
         regex = r'^(?:.*/)?[^/]+\.[^/]+$'
 
     app.url_map.converters['anyext'] = AnyExtensionConverter
+
+    # Compile the SQL model queries once, reload on change in debug
+    model_registry.load(
+        db_types={Config.DB_PWA_TYPE, Config.DB_SAFE_TYPE, Config.DB_FILES_TYPE},
+        auto_reload=app.debug
+    )
+
+    # bcrypt cost for this machine, the same for all the server processes
+    if not Config.BCRYPT_ROUNDS and Config.BCRYPT_TARGET_MS:
+        bcrypt_pool.calibrate(
+            Config.BCRYPT_TARGET_MS, Config.BCRYPT_MIN_ROUNDS, Config.BCRYPT_MAX_ROUNDS,
+            Config.BCRYPT_ROUNDS_FILE
+        )
+
     app.components = Components(app)
+    register_commands(app)
+
+    # Index of the new users and first build of the filter of the logins, in the background
+    if Config.LOGIN_FILTER:
+        create_login_index()
+        login_filter.refresh_async()
+
+    # Revocations of the signed sessions
+    if Config.SESSION_BACKEND == 'signed':
+        create_revocation_table()
+
+    # Periodic sweep of the expired sessions and pins, disabled by default
+    sweeper.start(Config.SWEEP_INTERVAL, Config.SWEEP_JITTER)
 
     return app
@@ -0,0 +1,100 @@
+"""Flask CLI commands: flask --app run <command>."""
+
+import sys
+
+import click
+from sqlalchemy.engine import make_url
+
+from core.index_advisor import advise
+from core.model_registry import model_registry
+from core.session_shards import reshard
+from core.sweeper import sweeper
+
+from .config import Config
+
+# Database of the model files that are not in DB_PWA
+MODEL_DATABASES = {
+    'session': ('DB_SAFE', 'DB_SAFE_TYPE'),
+}
+
+
+def model_database(name: str) -> tuple:
+    """URL and type of the database of a model file."""
+    url_key, type_key = MODEL_DATABASES.get(name, ('DB_PWA', 'DB_PWA_TYPE'))
+    return getattr(Config, url_key), getattr(Config, type_key)
+
+
+def register_commands(app) -> None:
+    """Register the CLI commands of the application."""
+
+    @app.cli.command('advise-indexes')
+    @click.option('--model', 'models', multiple=True, help='Model file to check, repeatable (default: all).')
+    @click.option('--key', 'keys', multiple=True, help='Query key to check, repeatable (default: all).')
+    @click.option('--url', default=None, help='Database with the project schema (default: the configured one).')
+    @click.option('--strict', is_flag=True, help='Exit with status 1 when a problem is found.')
+    def advise_indexes(models, keys, url, strict):
+        """Explain the model queries and suggest the missing indexes.
+
+        The full scans of the queries declared with "@scan" are listed as
+        expected. With --strict, exits with status 1 when any other full scan,
+        a temporary B-tree or a statement that can not be explained is found.
+        """
+        suggestions = {}
+        found = 0
+        for name in models or model_registry.names():
+            db_url, db_type = model_database(name)
+            if url:
+                db_url, db_type = url, make_url(url).get_backend_name()
+
+            for finding in advise(name, db_url, db_type, list(keys)):
+                index = "" if finding['index'] is None else f"[{finding['index']}]"
+                expected = " (expected)" if finding['expected'] else ""
+                click.echo(f"{finding['name']}/{finding['key']}{index} @{db_type}: "
+                           f"{finding['problem']}{expected} {finding['table'] or ''} -- {finding['detail']}")
+                if not finding['expected']:
+                    found += 1
+                if finding['suggestion']:
+                    suggestions.setdefault(db_type, []).append(finding['suggestion'])
+
+        for db_type, statements in suggestions.items():
+            click.echo(f"\n-- Suggested indexes for {db_type}")
+            for statement in dict.fromkeys(statements):
+                click.echo(statement)
+
+        if not found:
+            click.echo("No unexpected full scans or temporary B-trees found.")
+        elif strict:
+            sys.exit(1)
+
+    @app.cli.command('sweep')
+    def sweep():
+        """Delete the expired and closed sessions and the expired pins."""
+        failed = False
+        for task, report in sweeper.run_once().items():
+            click.echo(f"{task}: {report['deleted']} rows deleted in {report['batches']} batches, "
+                       f"{report['seconds']} s")
+            if report['error']:
+                failed = True
+                click.echo(f"{task}: {report['error']}", err=True)
+        if failed:
+            sys.exit(1)
+
+    @app.cli.command('reshard-sessions')
+    @click.option('--source', 'sources', multiple=True,
+                  help='Database with sessions, repeatable (default: DB_SAFE).')
+    @click.option('--target', 'targets', multiple=True,
+                  help='New shard, repeatable and in order (default: DB_SAFE_SHARDS).')
+    def reshard_sessions(sources, targets):
+        """Move the sessions to their shard in a new list of shards."""
+        targets = list(targets) or Config.DB_SAFE_SHARDS
+        if not targets:
+            raise click.UsageError("No target shards, set DB_SAFE_SHARDS or use --target.")
+
+        failed = False
+        for source, report in reshard(list(sources) or [Config.DB_SAFE], targets).items():
+            click.echo(f"{source}: {report['read']} read, {report['moved']} moved, {report['deleted']} deleted")
+            if report['error']:
+                failed = True
+                click.echo(f"{source}: {report['error']}", err=True)
+        if failed:
+            sys.exit(1)
@@ -9,6 +9,8 @@ from importlib import import_module
 from flask import Blueprint
 
 from constants import UUID_MAX_LEN, UUID_MIN_LEN
+from utils.layered_dict import BaseJson
+from utils.stats import register_stats
 from utils.utils import merge_dict, parse_vars
 
 from .config import Config
@@ -41,6 +43,10 @@ class Components:
         self._register_blueprints()
         self._component_snip()
 
+        # The schema is final here, its branches are serialized once for all the renders
+        self.schema_json = BaseJson(self.schema)
+        register_stats('schema_json', self.schema_json.stats)
+
     def _register_manifest(self):
         """Registers manifests for valid components."""
 
@@ -48,9 +48,23 @@ class Config: # pylint: disable=too-few-public-methods
     THEME_COLOR_KEY = "theme_color"
     TAB_CHANGES_KEY = "tabstatus"
 
+    # Parsed User-Agent and negotiated Accept-Language by header value, 0 disables them
+    UA_CACHE_SIZE = int(config.get('UA_CACHE_SIZE', 2048))
+    LANGUAGE_CACHE_SIZE = int(config.get('LANGUAGE_CACHE_SIZE', 1024))
+
     SESSION_KEY = "SESSION"
     SESSION_TOKEN_LENGTH = int(config.get('SESSION_TOKEN_LENGTH', 32))
     SESSION_IDLE_EXPIRES_SECONDS = int(config.get('SESSION_IDLE_EXPIRES_SECONDS', 2592000))
+    # Session touch writes are coalesced and flushed every N seconds or M sessions (0: write at once)
+    SESSION_TOUCH_FLUSH_SECONDS = float(config.get('SESSION_TOUCH_FLUSH_SECONDS', 5))
+    SESSION_TOUCH_MAX_PENDING = int(config.get('SESSION_TOUCH_MAX_PENDING', 500))
+    # Validated sessions cached in process, 0 disables it. The TTL is capped to a tenth
+    # of the idle expiry, a closed session is still valid in other processes until it expires
+    SESSION_CACHE_SIZE = int(config.get('SESSION_CACHE_SIZE', 10000))
+    SESSION_CACHE_TTL = min(int(config.get('SESSION_CACHE_TTL', 15)), SESSION_IDLE_EXPIRES_SECONDS // 10)
+    # Session backend: db (session table) or signed (stateless signed cookie, see core.signed_session)
+    SESSION_BACKEND = config.get('SESSION_BACKEND', 'db').lower()
+    SESSION_REVOCATION_REFRESH = int(config.get('SESSION_REVOCATION_REFRESH', 30))
     UTOKEN_KEY = "USER_SECURITY"
     UTOKEN_IDLE_EXPIRES_SECONDS = int(config.get('UTOKEN_IDLE_EXPIRES_SECONDS', 14400))
     FTOKEN_EXPIRES_SECONDS = int(config.get('FTOKEN_EXPIRES_SECONDS', 240))
@@ -61,6 +75,28 @@ class Config: # pylint: disable=too-few-public-methods
 
     UUID_MIN = int(config.get('UUID_MIN', 1000000000000))
     UUID_MAX = int(config.get('UUID_MAX', 9999999999999))
+    UID_BLOCK_SIZE = int(config.get('UID_BLOCK_SIZE', 20))
+    UID_LOW_WATERMARK = int(config.get('UID_LOW_WATERMARK', 5))
+
+    # bcrypt process pool per server process (0 workers: inline) and operations allowed to wait
+    BCRYPT_WORKERS = int(config.get('BCRYPT_WORKERS', os.cpu_count() or 1))
+    BCRYPT_MAX_QUEUE = int(config.get('BCRYPT_MAX_QUEUE', 32))
+
+    # bcrypt cost, 0 calibrates it at startup to hash in about BCRYPT_TARGET_MS on this machine.
+    # The calibrated cost is stored in BCRYPT_ROUNDS_FILE and shared by all the server processes,
+    # delete the file to calibrate again. Set the cost when several machines share the users,
+    # or their logins rehash back and forth
+    BCRYPT_ROUNDS = int(config.get('BCRYPT_ROUNDS', 0))
+    BCRYPT_TARGET_MS = int(config.get('BCRYPT_TARGET_MS', 250))
+    BCRYPT_MIN_ROUNDS = int(config.get('BCRYPT_MIN_ROUNDS', 10))
+    BCRYPT_MAX_ROUNDS = int(config.get('BCRYPT_MAX_ROUNDS', 16))
+    BCRYPT_ROUNDS_FILE = config.get('BCRYPT_ROUNDS_FILE', '') or os.path.join(TMP_DIR, 'bcrypt-rounds')
+
+    # Bloom filter of the logins that rejects unknown logins without a query (see core.login_filter)
+    LOGIN_FILTER = config.get('LOGIN_FILTER', 'false').lower() == 'true'
+    LOGIN_FILTER_ERROR_RATE = float(config.get('LOGIN_FILTER_ERROR_RATE', 0.001))
+    LOGIN_FILTER_REFRESH = int(config.get('LOGIN_FILTER_REFRESH', 60))
+    LOGIN_FILTER_REBUILD = int(config.get('LOGIN_FILTER_REBUILD', 3600))
 
     MAIL_METHOD = config.get('MAIL_METHOD', 'smtp')
     MAIL_TO_FILE = config.get('MAIL_TO_FILE', '/tmp/test_mail.html')
@@ -115,6 +151,47 @@ class Config: # pylint: disable=too-few-public-methods
     DB_FILES_PORT = config.get('DB_FILES_PORT', '')
     DB_FILES_PATH = config.get('DB_FILES_PATH', '') or os.path.join(BASE_DIR, "..", 'storage')  # SQLite
 
+    # Connection pool, one per database shared by the whole process
+    DB_POOL_SIZE = int(config.get('DB_POOL_SIZE', 5))
+    DB_POOL_MAX_OVERFLOW = int(config.get('DB_POOL_MAX_OVERFLOW', 10))
+    DB_POOL_RECYCLE = int(config.get('DB_POOL_RECYCLE', -1))
+    DB_POOL_PRE_PING = config.get('DB_POOL_PRE_PING', 'False').lower() == 'true'
+
+    # Session shards, comma separated URLs of DB_SAFE_TYPE databases, replace DB_SAFE for the
+    # session table when set (see core.session_shards, flask reshard-sessions)
+    DB_SAFE_SHARDS = [url.strip() for url in config.get('DB_SAFE_SHARDS', '').split(',') if url.strip()]
+
+    # Read replicas, comma separated SQLAlchemy URLs used round-robin for SELECT (empty: none)
+    DB_PWA_REPLICAS = [url.strip() for url in config.get('DB_PWA_REPLICAS', '').split(',') if url.strip()]
+    DB_SAFE_REPLICAS = [url.strip() for url in config.get('DB_SAFE_REPLICAS', '').split(',') if url.strip()]
+    DB_FILES_REPLICAS = [url.strip() for url in config.get('DB_FILES_REPLICAS', '').split(',') if url.strip()]
+
+    # Rows per executemany call in Model.exec_many
+    DB_EXEC_MANY_CHUNK = int(config.get('DB_EXEC_MANY_CHUNK', 500))
+
+    # Rows fetched per batch in Model.exec_iter
+    DB_STREAM_BATCH = int(config.get('DB_STREAM_BATCH', 1000))
+
+    # Commit all the writes of a request together when it ends (see core.unit_of_work)
+    DB_BATCH_WRITES = config.get('DB_BATCH_WRITES', 'False').lower() == 'true'
+
+    # Result cache of the queries declared with "@cache" in the model files, 0 disables it
+    MODEL_CACHE_SIZE = int(config.get('MODEL_CACHE_SIZE', 1024))
+    MODEL_CACHE_TTL = int(config.get('MODEL_CACHE_TTL', 10))
+
+    # Log the model queries slower than this, 0 disables it
+    MODEL_SLOW_QUERY_MS = int(config.get('MODEL_SLOW_QUERY_MS', 200))
+
+    # Sweeper of expired and closed sessions and expired pins (see core.sweeper)
+    # Seconds between in-process runs, 0 disables it (flask sweep still works)
+    SWEEP_INTERVAL = int(config.get('SWEEP_INTERVAL', 0))
+    SWEEP_JITTER = float(config.get('SWEEP_JITTER', 0.1))
+    SWEEP_BATCH = int(config.get('SWEEP_BATCH', 500))
+    SWEEP_PAUSE_MS = int(config.get('SWEEP_PAUSE_MS', 50))
+
+    # Signal that dumps the runtime statistics to stderr, e.g. SIGUSR1 (empty: disabled)
+    STATS_SIGNAL = config.get('STATS_SIGNAL', '')
+
     if DB_PWA_TYPE == 'sqlite':
         DB_PWA = f"sqlite:///{Path(DB_PWA_PATH).joinpath(f'{DB_PWA_NAME}')}"
     else:
@@ -129,3 +206,10 @@ class Config: # pylint: disable=too-few-public-methods
         DB_FILES = f"sqlite:///{Path(DB_FILES_PATH).joinpath(f'{DB_FILES_NAME}')}"
     else:
         DB_FILES = f"{DB_FILES_TYPE}://{DB_FILES_USER}:{DB_FILES_PASSWORD}@{DB_FILES_HOST}:{DB_FILES_PORT}/{DB_FILES_NAME}"
+
+    # Replica URLs by primary URL
+    DB_REPLICAS = {
+        DB_PWA: DB_PWA_REPLICAS,
+        DB_SAFE: DB_SAFE_REPLICAS,
+        DB_FILES: DB_FILES_REPLICAS
+    }
@@ -24,5 +24,6 @@ DELETED = 'deleted'
 UNCONFIRMED = 'unconfirmed'
 UNVALIDATED = 'unvalidated'
 USER_EXISTS = "USER_EXISTS"
+BUSY = "BUSY"
 
 SPAM = 'spam'
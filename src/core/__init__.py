@@ -5,8 +5,10 @@ from app.config import Config
 from .dispatcher import Dispatcher
 from .dispatcher_form import DispatcherForm
 from .model import Model
+from .async_model import AsyncModel
 from .schema import Schema
 from .session import Session
+from .signed_session import SignedSession
 from .user import User
 from .template import Template
 from .mail import Mail
@@ -16,8 +18,10 @@ __all__ = [
     'Dispatcher',
     'DispatcherForm',
     'Model',
+    'AsyncModel',
     'Schema',
     'Session',
+    'SignedSession',
     'User',
     'Template',
     'Mail'
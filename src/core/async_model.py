@@ -0,0 +1,281 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Asyncio variant of the Model class.
+
+AsyncModel shares with Model everything that does no I/O (core.model_base):
+JSON-defined queries, dialect resolution, error handling, query cache, read
+replicas and transaction semantics, and runs the statements on the SQLAlchemy
+asyncio engine (aiosqlite for SQLite), so coroutines can run database queries
+concurrently with other I/O instead of blocking a thread per query.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy.engine import CursorResult, Row
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import Config
+from .engine import get_async_engine
+from .model import Model
+from .model_base import ModelBase
+from .model_cache import query_cache
+from .model_registry import Statement
+from .model_stats import query_stats
+from .unit_of_work import HANDLED_ERRORS
+
+
+class AsyncModel(ModelBase):
+    """Model with awaitable exec(), exec_many(), exec_iter() and create_uid().
+
+    The error attributes (has_error, error_code, ...) work as in Model, use one
+    AsyncModel instance per task to keep them apart. The pooled connections belong
+    to the event loop that opened them, await core.engine.dispose_async_engines()
+    before that loop is closed.
+
+    The statements run in their own transactions, they do not join the batched
+    transaction of the request unit of work (Config.DB_BATCH_WRITES).
+
+    Attributes:
+        engine: SQLAlchemy AsyncEngine shared by all the async models of the same database URL
+    """
+
+    def __init__(self, db_url: str, db_type: str):
+        """Initialize a new AsyncModel instance with the shared async engine of the database.
+
+        Args:
+            db_url: SQLAlchemy connection URL, the async driver is added if not set
+            db_type: Database type used to resolve the @dialect aliases
+        """
+        super().__init__(db_url, db_type)
+        try:
+            self.engine = get_async_engine(db_url)
+        except SQLAlchemyError as e:
+            raise RuntimeError("Failed to initialize database engine") from e
+
+    async def create_uid(self, target: str, attempts: int = 10) -> Optional[int]:
+        """Create a unique identifier, see Model.create_uid().
+
+        The block reservation is synchronous, it runs in a worker thread.
+        """
+        model = Model(self.db_url, self.db_type)
+        uid = await asyncio.to_thread(model.create_uid, target, attempts)
+        self.clear_error()
+        if model.has_error:
+            self._set_error(model.last_error, model.user_error, model.error_code)
+        return uid
+
+    async def reserve_uids(self, target: str, count: int, attempts: int = 10) -> List[int]:
+        """Reserve unique identifiers, see Model.reserve_uids(), in a worker thread."""
+        model = Model(self.db_url, self.db_type)
+        uids = await asyncio.to_thread(model.reserve_uids, target, count, attempts)
+        self.clear_error()
+        if model.has_error:
+            self._set_error(model.last_error, model.user_error, model.error_code)
+        return uids
+
+    async def exec(
+        self,
+        name: str,
+        key: str,
+        data: Union[Tuple, List[Tuple]] = None,
+        compact: bool = False
+    ) -> Union[
+        Dict[str, Any],         # single statement
+        List[Dict[str, Any]],   # multiple transactions
+        None                    # in case of error
+    ]:
+        """Execute SQL queries from JSON file, see Model.exec()."""
+        self.clear_error()
+        self._cache_hit = False
+
+        start = time.perf_counter()
+        result = await self._exec(name, key, data)
+        query_stats.record(
+            name, key, self.db_type, time.perf_counter() - start,
+            result, self.has_error, data, self._cache_hit
+        )
+        return self._compact(result) if compact else result
+
+    async def _exec(
+        self,
+        name: str,
+        key: str,
+        data: Union[Tuple, List[Tuple]] = None
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]], None]:
+        """Look up the query in the registry and execute it, see exec()."""
+        sql_content = self._get_sql_content(name, key)
+        if sql_content is None:
+            return None
+
+        # Case 1: Simple statement
+        if isinstance(sql_content, Statement):
+            if sql_content.cache and query_cache.maxsize > 0:
+                return await self._execute_cached(name, key, sql_content, data)
+            return await self._execute_single(sql_content, data)
+
+        # Case 2: Transaction (list of statements)
+        elif isinstance(sql_content, list):
+            return await self._execute_transaction(sql_content, data)
+
+        else:
+            self._invalid_content(key)
+            return None
+
+    async def exec_many(
+        self,
+        name: str,
+        key: str,
+        rows: List[Dict[str, Any]],
+        chunk_size: int = None
+    ) -> Union[Dict[str, Any], None]:
+        """Execute one statement with a list of parameter sets in a single transaction,
+        see Model.exec_many()."""
+        self.clear_error()
+
+        start = time.perf_counter()
+        result = await self._exec_many(name, key, rows, chunk_size)
+        query_stats.record(
+            name, key, self.db_type, time.perf_counter() - start,
+            result, self.has_error, rows
+        )
+        return result
+
+    async def _exec_many(
+        self,
+        name: str,
+        key: str,
+        rows: List[Dict[str, Any]],
+        chunk_size: int = None
+    ) -> Union[Dict[str, Any], None]:
+        """Look up the statement in the registry and execute it with all the rows, see exec_many()."""
+        statement = self._many_statement(name, key)
+        if statement is None:
+            return None
+
+        chunk_size = chunk_size or Config.DB_EXEC_MANY_CHUNK
+        chunks = []
+
+        try:
+            if chunk_size < 1:
+                raise ValueError(f"Invalid chunk size: {chunk_size}")
+
+            if rows:
+                self._pin_primary()
+                async with self.engine.begin() as conn:
+                    for start in range(0, len(rows), chunk_size):
+                        result: CursorResult = await conn.execute(statement.clause, rows[start:start + chunk_size])
+                        chunks.append(result.rowcount)
+
+                self._invalidate_cache(statement.tables)
+
+        except HANDLED_ERRORS as e:
+            self._transaction_error(e)
+            return None
+
+        return self._many_result(statement, chunks)
+
+    async def exec_iter(
+        self,
+        name: str,
+        key: str,
+        data: Dict[str, Any] = None,
+        batch_size: int = None
+    ) -> AsyncIterator[Row]:
+        """Execute a SELECT from JSON file and yield its rows without loading them all,
+        see Model.exec_iter()."""
+        self.clear_error()
+
+        statement = self._iter_statement(name, key)
+        if statement is None:
+            return
+
+        try:
+            async with self._read_engine().connect() as conn:
+                conn = await conn.execution_options(yield_per=batch_size or Config.DB_STREAM_BATCH)
+                result = await conn.stream(statement.clause, data or {})
+                async for partition in result.partitions():
+                    for row in partition:
+                        yield row
+
+        except HANDLED_ERRORS as e:
+            self._database_error(e)
+
+    async def _execute_cached(
+        self,
+        name: str,
+        key: str,
+        statement: Statement,
+        params: Dict[str, Any] = None
+    ) -> Union[Dict[str, Any], None]:
+        """Execute a SELECT declared with "@cache" through the query cache."""
+        cache_key = self._cache_key(name, key, params)
+        if cache_key is None:
+            return await self._execute_single(statement, params)
+
+        result = self._cached_result(cache_key)
+        if result is not None:
+            return result
+
+        result = await self._execute_single(statement, params)
+        self._store_result(cache_key, statement, result)
+        return result
+
+    def _read_engine(self) -> AsyncEngine:
+        """Async engine for a read: a replica, or the primary after a write to the database."""
+        read_url = self._read_url()
+        return self.engine if read_url == self.db_url else get_async_engine(read_url)
+
+    async def _execute_single(
+        self,
+        statement: Statement,
+        params: Tuple = None
+    ) -> Union[Dict[str, Any], None]:
+        """Execute a single SQL statement and return its result."""
+        try:
+            if statement.operation == "SELECT":
+                engine = self._read_engine()
+            else:
+                engine = self.engine
+                self._pin_primary()
+
+            async with engine.begin() as conn:
+                result: CursorResult = await conn.execute(statement.clause, params or {})
+                res = self._single_result(statement, result)
+
+            self._invalidate_cache(statement.tables)
+            return res
+
+        except HANDLED_ERRORS as e:
+            self._database_error(e)
+            return None
+
+    async def _execute_transaction(
+        self,
+        statements: List[Statement],
+        params_list: List[Tuple] = None
+    ) -> Union[List[Dict[str, Any]], None]:
+        """Execute multiple SQL statements as a single transaction."""
+        params_list = self._transaction_params(statements, params_list)
+        if params_list is None:
+            return None
+
+        try:
+            results = []
+
+            if any(statement.operation != "SELECT" for statement in statements):
+                self._pin_primary()
+
+            async with self.engine.begin() as conn:
+                for i, (statement, params) in enumerate(zip(statements, params_list)):
+                    result: CursorResult = await conn.execute(statement.clause, params)
+                    results.append(self._transaction_result(i, statement, result))
+
+            self._invalidate_cache(table for statement in statements for table in statement.tables)
+            return results
+
+        except HANDLED_ERRORS as e:
+            self._transaction_error(e)
+            return None
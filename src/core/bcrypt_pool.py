@@ -0,0 +1,203 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Bounded process pool for the bcrypt hashes of User.
+
+bcrypt takes tens to hundreds of milliseconds of CPU, run inline it delays the
+other requests of the same worker. The hashes run in Config.BCRYPT_WORKERS
+processes (default: one per core, 0 runs them inline), with at most
+Config.BCRYPT_MAX_QUEUE waiting. When the queue is full BcryptBusyError is
+raised at once, the client should retry later.
+
+The pool processes are forked on first use, in each process of the server.
+
+The cost of the new hashes (rounds) is Config.BCRYPT_ROUNDS, or calibrated by
+calibrate() at startup so a hash takes about Config.BCRYPT_TARGET_MS. The
+calibrated cost is stored in Config.BCRYPT_ROUNDS_FILE by the first process
+and read from there by the others, so all the workers of the machine hash with
+the same cost instead of each one measuring its own.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+import bcrypt
+
+try:
+    import fcntl
+except ImportError:  # Windows, the file is not locked
+    fcntl = None
+
+from app.config import Config
+from utils.stats import register_stats
+
+# bcrypt default cost, used when BCRYPT_ROUNDS is not set until calibrate()
+DEFAULT_ROUNDS = 12
+
+logger = logging.getLogger(__name__)
+
+
+class BcryptBusyError(RuntimeError):
+    """Too many bcrypt operations waiting, retryable."""
+
+
+def _timed(func: Callable, *args) -> Tuple[Any, float, float]:
+    """Run in a pool process: result, start and end wall time."""
+    started = time.time()
+    result = func(*args)
+    return result, started, time.time()
+
+
+class BcryptPool:
+    """bcrypt hashpw/checkpw on a bounded process pool.
+
+    Attributes:
+        workers: Pool processes, 0 runs inline
+        max_queue: Operations allowed to wait for a free process
+        rounds: bcrypt cost of the new hashes
+    """
+
+    def __init__(self, workers: int, max_queue: int, rounds: int = DEFAULT_ROUNDS):
+        self.workers = max(0, workers)
+        self.max_queue = max(0, max_queue)
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._stats = {
+            'calls': 0, 'rejected': 0, 'max_inflight': 0,
+            'wait_ms': 0.0, 'max_wait_ms': 0.0, 'compute_ms': 0.0, 'max_compute_ms': 0.0
+        }
+
+    def calibrate(self, target_ms: int, min_rounds: int, max_rounds: int, path: str = None) -> int:
+        """Set the cost whose hash takes about target_ms on this machine.
+
+        Each round doubles the time, the fastest of three hashes at min_rounds
+        is enough to extrapolate.
+
+        Args:
+            target_ms: Time of a hash to aim for
+            min_rounds: Lowest cost allowed, also the cost measured
+            max_rounds: Highest cost allowed
+            path: File with the cost calibrated for the same arguments, read
+                  if it has one, otherwise the cost is calibrated and stored
+
+        Returns:
+            The cost set in self.rounds
+        """
+        if not path:
+            self.rounds = self._measure(target_ms, min_rounds, max_rounds)
+            return self.rounds
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        key = f"{target_ms} {min_rounds} {max_rounds}"
+        with open(path, 'a+', encoding='utf-8') as file:
+            # Only one process of the machine calibrates, the others wait and read it
+            if fcntl:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            file.seek(0)
+            stored_key, _, stored = file.read().strip().rpartition(' ')
+            if stored_key == key and stored.isdigit():
+                self.rounds = int(stored)
+                logger.info("bcrypt cost %d: read from %s", self.rounds, path)
+            else:
+                self.rounds = self._measure(target_ms, min_rounds, max_rounds)
+                file.seek(0)
+                file.truncate()
+                file.write(f"{key} {self.rounds}\n")
+        return self.rounds
+
+    def _measure(self, target_ms: int, min_rounds: int, max_rounds: int) -> int:
+        measured = min(
+            finished - started
+            for _, started, finished in (
+                _timed(bcrypt.hashpw, b'calibration', bcrypt.gensalt(min_rounds)) for _ in range(3)
+            )
+        ) * 1000
+        extra = round(math.log2(target_ms / measured)) if target_ms > measured > 0 else 0
+        rounds = max(min_rounds, min(max_rounds, min_rounds + extra))
+        logger.info("bcrypt cost %d: %.1f ms at cost %d, target %d ms", rounds, measured, min_rounds, target_ms)
+        return rounds
+
+    def hashpw(self, password: bytes, salt: bytes = None) -> bytes:
+        """bcrypt.hashpw() in the pool, by default with a new salt of the current cost."""
+        return self._run(bcrypt.hashpw, password, salt or bcrypt.gensalt(self.rounds))
+
+    def checkpw(self, password: bytes, hashed: bytes) -> bool:
+        """bcrypt.checkpw() in the pool."""
+        return self._run(bcrypt.checkpw, password, hashed)
+
+    def _run(self, func: Callable, *args) -> Any:
+        if not self.workers:
+            result, started, finished = _timed(func, *args)
+            self._record(started, started, finished)
+            return result
+
+        with self._lock:
+            if self._inflight >= self.workers + self.max_queue:
+                self._stats['rejected'] += 1
+                raise BcryptBusyError("Too many password checks in progress, try again later")
+            self._inflight += 1
+            self._stats['max_inflight'] = max(self._stats['max_inflight'], self._inflight)
+            if self._executor is None:
+                context = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context(context))
+            executor = self._executor
+
+        submitted = time.time()
+        try:
+            result, started, finished = executor.submit(_timed, func, *args).result()
+        except BrokenProcessPool as e:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise BcryptBusyError("Password pool restarted, try again later") from e
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+        self._record(submitted, started, finished)
+        return result
+
+    def _record(self, submitted: float, started: float, finished: float) -> None:
+        wait_ms = max(started - submitted, 0) * 1000
+        compute_ms = (finished - started) * 1000
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['wait_ms'] += wait_ms
+            self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+            self._stats['compute_ms'] += compute_ms
+            self._stats['max_compute_ms'] = max(self._stats['max_compute_ms'], compute_ms)
+
+    def stats(self) -> dict:
+        """Queue wait and compute times, in milliseconds."""
+        with self._lock:
+            calls = self._stats['calls']
+            return {
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in self._stats.items()},
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'inflight': self._inflight,
+                'avg_wait_ms': round(self._stats['wait_ms'] / calls, 3) if calls else 0.0,
+                'avg_compute_ms': round(self._stats['compute_ms'] / calls, 3) if calls else 0.0
+            }
+
+    def _after_fork_in_child(self) -> None:
+        """The pool processes of the parent can not be used by the child."""
+        self._lock = threading.Lock()
+        self._executor = None
+        self._inflight = 0
+
+
+bcrypt_pool = BcryptPool(Config.BCRYPT_WORKERS, Config.BCRYPT_MAX_QUEUE, Config.BCRYPT_ROUNDS or DEFAULT_ROUNDS)
+
+register_stats('bcrypt', bcrypt_pool.stats)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=bcrypt_pool._after_fork_in_child)  # pylint: disable=protected-access
@@ -11,8 +11,10 @@ from utils.tokens import (
 from utils.sbase64url import sbase64url_md5
 from .schema import Schema
 from .session import Session
+from .signed_session import SignedSession
 from .user import User
 from .template import Template
+from .unit_of_work import open_unit_of_work
 
 
 class Dispatcher:
@@ -21,6 +23,7 @@ class Dispatcher:
     def __init__(self, req, comp_route, neutral_route=None, ltoken=None, ftoken_field_name=None):
         """Initialize dispatcher with request, route and optional tokens."""
         self.req = req
+        open_unit_of_work()
         self._comp_route = f'{Config.COMP_ROUTE_ROOT}/{comp_route}'.strip("/")
         self._neutral_route = neutral_route
         self._ltoken = ltoken
@@ -29,7 +32,8 @@ class Dispatcher:
         self.schema_data = self.schema.properties['data']
         self.schema_local_data = self.schema.properties['inherit']['data']
         self.ajax_request = self.schema_data['CONTEXT']['HEADERS'].get("Requested-With-Ajax") or False
-        self.session = Session(self.schema_data['CONTEXT']['SESSION'])
+        session_backend = SignedSession if Config.SESSION_BACKEND == 'signed' else Session
+        self.session = session_backend(self.schema_data['CONTEXT']['SESSION'])
         self.user = User()
         self.view = Template(self.schema)
         self._set_current_comp()
@@ -0,0 +1,157 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Process-wide registry of SQLAlchemy engines.
+
+One engine (and its connection pool) is created per database URL and shared by
+all the Model instances of the process, so requests reuse pooled connections
+instead of building a new engine each time. The read replicas configured for a
+database get their own engines, their URLs are handed out round-robin by
+next_replica_url().
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.config import Config
+
+# Driver used by the async engines when the URL does not set one
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'mysql': 'aiomysql',
+    'mariadb': 'aiomysql'
+}
+
+_engines: Dict[str, Engine] = {}
+_async_engines: Dict[str, AsyncEngine] = {}
+_replica_turn: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def get_engine(db_url: str) -> Engine:
+    """Get the shared engine for a database URL, creating it on first use.
+
+    Args:
+        db_url: SQLAlchemy connection URL (Config.DB_PWA, Config.DB_SAFE, ...)
+
+    Returns:
+        Engine shared by the whole process for that URL
+    """
+    engine = _engines.get(db_url)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(db_url)
+            if engine is None:
+                engine = create_engine(db_url, **pool_options(db_url))
+                if engine.dialect.name == 'sqlite':
+                    _sqlite_transactions(engine)
+                _engines[db_url] = engine
+    return engine
+
+
+def _sqlite_transactions(engine: Engine) -> None:
+    """Let SQLAlchemy emit BEGIN instead of the sqlite3 driver, so SAVEPOINTs work.
+
+    The driver only begins a transaction before an INSERT/UPDATE/DELETE, a
+    SAVEPOINT before it would start and, when released, commit the transaction.
+    """
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, _connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+def next_replica_url(db_url: str) -> Optional[str]:
+    """URL of the next read replica of a database, round-robin.
+
+    Args:
+        db_url: SQLAlchemy connection URL of the primary database
+
+    Returns:
+        URL of a replica from Config.DB_REPLICAS, None if the database has no replicas
+    """
+    replicas = Config.DB_REPLICAS.get(db_url)
+    if not replicas:
+        return None
+    with _lock:
+        turn = _replica_turn.get(db_url, 0)
+        _replica_turn[db_url] = (turn + 1) % len(replicas)
+    return replicas[turn]
+
+
+def get_async_engine(db_url: str) -> AsyncEngine:
+    """Get the shared asyncio engine for a database URL, creating it on first use.
+
+    The same URLs as get_engine() are accepted, the async driver of the dialect
+    is set when the URL does not include one (sqlite:// -> sqlite+aiosqlite://).
+
+    Args:
+        db_url: SQLAlchemy connection URL (Config.DB_PWA, Config.DB_SAFE, ...)
+
+    Returns:
+        AsyncEngine shared by the whole process for that URL
+    """
+    engine = _async_engines.get(db_url)
+    if engine is None:
+        with _lock:
+            engine = _async_engines.get(db_url)
+            if engine is None:
+                url = make_url(db_url)
+                if "+" not in url.drivername and url.drivername in ASYNC_DRIVERS:
+                    url = url.set(drivername=f"{url.drivername}+{ASYNC_DRIVERS[url.drivername]}")
+                engine = create_async_engine(url, **pool_options(db_url))
+                _async_engines[db_url] = engine
+    return engine
+
+
+def pool_options(db_url: str) -> Dict[str, Any]:
+    """Connection pool options from config/.env for a database URL."""
+    options: Dict[str, Any] = {"pool_pre_ping": Config.DB_POOL_PRE_PING}
+    url = make_url(db_url)
+
+    # In-memory SQLite uses a single connection pool without size options
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+
+    options["pool_size"] = Config.DB_POOL_SIZE
+    options["max_overflow"] = Config.DB_POOL_MAX_OVERFLOW
+    options["pool_recycle"] = Config.DB_POOL_RECYCLE
+    return options
+
+
+def dispose_engines(close: bool = True) -> None:
+    """Dispose all the engines and their pooled connections.
+
+    Args:
+        close: Close the pooled connections. Use False in a forked child so the
+               connections inherited from the parent are discarded, not closed.
+    """
+    for engine in list(_engines.values()):
+        engine.dispose(close=close)
+    for async_engine in list(_async_engines.values()):
+        async_engine.sync_engine.dispose(close=close)
+
+
+async def dispose_async_engines() -> None:
+    """Dispose the async engines, await it before the event loop is closed."""
+    for async_engine in list(_async_engines.values()):
+        await async_engine.dispose()
+
+
+def _after_fork_in_child() -> None:
+    """Preforking servers: do not share the parent's connections with the child."""
+    global _lock  # pylint: disable=global-statement
+    _lock = threading.Lock()
+    dispose_engines(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
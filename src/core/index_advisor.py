@@ -0,0 +1,241 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""EXPLAIN-based index advisor for the model queries.
+
+Every statement of the model files is run through the EXPLAIN of its database
+(EXPLAIN QUERY PLAN on SQLite) with placeholder parameters. Full table scans
+and temporary B-trees or sorts are reported with a suggested CREATE INDEX built
+from the columns the statement filters, joins or orders by, unless they start
+with the primary key of the table. The queries declared with "@scan": true in
+their model file read whole tables on purpose, their full scans are reported
+as expected.
+
+The plan depends on the schema and the indexes of the database it runs
+against, run it with the project schema applied. PostgreSQL prefers sequential
+scans on small tables, so they are disabled while explaining: a Seq Scan that
+remains means that no index can be used.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+from .engine import get_engine
+from .model_registry import Statement, model_registry
+
+FULL_SCAN = 'FULL_SCAN'
+TEMP_BTREE = 'TEMP_BTREE'
+
+# Placeholder bound to every parameter, an untyped string literal is accepted
+# by the integer and text columns of all the dialects and keeps the index usable
+PLACEHOLDER = '0'
+
+TABLE_REF = re.compile(
+    r'\b(?:FROM|JOIN|UPDATE|INTO)\s+[`"\[]?(\w+)[`"\]]?'
+    r'(?:\s+(?:AS\s+)?'
+    r'(?!(?:LEFT|RIGHT|INNER|OUTER|CROSS|FULL|JOIN|ON|WHERE|SET|GROUP|ORDER|LIMIT|VALUES)\b)(\w+))?',
+    re.IGNORECASE
+)
+FILTER_CLAUSE = re.compile(
+    r'\b(?:ON|WHERE)\b(.*?)'
+    r'(?=\b(?:LEFT|RIGHT|INNER|CROSS|FULL|JOIN|WHERE|GROUP|ORDER|LIMIT|HAVING|RETURNING)\b|$)',
+    re.IGNORECASE | re.DOTALL
+)
+CONDITION = re.compile(
+    r'(?:\b(\w+)\.)?\b(\w+)\s*(=|<=|>=|<>|!=|<|>|\bLIKE\b|\bIN\b)\s*(?:\b(\w+)\.(\w+)\b|:\w+|\(|\'|\d)',
+    re.IGNORECASE
+)
+ORDER_BY = re.compile(r'\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|\bOFFSET\b|$)', re.IGNORECASE | re.DOTALL)
+RANGE_OPERATORS = ('<', '>', '<=', '>=', '<>', '!=', 'LIKE')
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)', re.IGNORECASE)
+# An automatic index is built scanning the whole table on each execution
+SQLITE_AUTOMATIC = re.compile(r'^SEARCH (?:TABLE )?(\w+) USING AUTOMATIC', re.IGNORECASE)
+POSTGRESQL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def explain(conn: Connection, db_type: str, statement: Statement) -> List[Any]:
+    """Plan of a statement in the database, the statement is not executed.
+
+    Args:
+        conn: Connection inside a transaction, it is rolled back by the caller
+        db_type: Database type: sqlite, postgresql, mysql, mariadb
+        statement: Compiled statement
+
+    Returns:
+        The rows of the EXPLAIN output
+    """
+    params = {name: PLACEHOLDER for name in statement.clause.compile().params}
+    if db_type == 'sqlite':
+        return conn.execute(text(f"EXPLAIN QUERY PLAN {statement.sql}"), params).fetchall()
+    if db_type == 'postgresql':
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+    return conn.execute(text(f"EXPLAIN {statement.sql}"), params).fetchall()
+
+
+def plan_problems(db_type: str, plan: List[Any]) -> List[Tuple[str, Optional[str], str]]:
+    """Full scans and temporary B-trees in an EXPLAIN output.
+
+    Returns:
+        List of (problem, table or alias, plan detail)
+    """
+    problems = []
+    for row in plan:
+        if db_type == 'sqlite':
+            detail = str(row[-1])
+            match = SQLITE_SCAN.match(detail) or SQLITE_AUTOMATIC.match(detail)
+            if match and not detail.upper().startswith('SCAN CONSTANT'):
+                problems.append((FULL_SCAN, match.group(1), detail))
+            elif 'TEMP B-TREE' in detail.upper():
+                problems.append((TEMP_BTREE, None, detail))
+
+        elif db_type == 'postgresql':
+            detail = str(row[0]).strip()
+            match = POSTGRESQL_SCAN.search(detail)
+            if match:
+                problems.append((FULL_SCAN, match.group(1), detail))
+            elif detail.lstrip('-> ').startswith(('Sort ', 'HashAggregate ')):
+                problems.append((TEMP_BTREE, None, detail))
+
+        else:
+            row = row._asdict()
+            table = row.get('table')
+            extra = str(row.get('Extra') or '')
+            if row.get('type') == 'ALL':
+                problems.append((FULL_SCAN, table, f"type=ALL table={table} {extra}".strip()))
+            if 'Using temporary' in extra or 'Using filesort' in extra:
+                problems.append((TEMP_BTREE, table, f"table={table} {extra}"))
+    return problems
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """Table name of each table and alias referenced by a statement."""
+    aliases = {}
+    for table, alias in TABLE_REF.findall(sql):
+        aliases[table.lower()] = table
+        if alias:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def index_columns(sql: str, table: str) -> List[str]:
+    """Columns of a table worth indexing for a statement.
+
+    The columns compared by equality in the WHERE and ON clauses go first, then
+    the first range condition, then the ORDER BY columns.
+    """
+    aliases = table_aliases(sql)
+    names = {name for name, target in aliases.items() if target.lower() == table.lower()}
+    single_table = len(set(aliases.values())) == 1
+
+    def own(qualifier: str) -> bool:
+        return qualifier.lower() in names if qualifier else single_table
+
+    equal, ranges, order = [], [], []
+    for clause in FILTER_CLAUSE.findall(sql):
+        for left_qual, left_col, operator, right_qual, right_col in CONDITION.findall(clause):
+            operator = operator.upper()
+            if own(left_qual):
+                column = left_col
+            elif right_qual and own(right_qual) and operator == '=':
+                column = right_col
+            else:
+                continue
+            (ranges if operator in RANGE_OPERATORS else equal).append(column)
+
+    for clause in ORDER_BY.findall(sql):
+        for item in clause.split(','):
+            parts = item.strip().split()[0].split('.') if item.strip() else []
+            if parts and own(parts[0] if len(parts) == 2 else ''):
+                order.append(parts[-1])
+
+    columns = []
+    for column in equal + ranges[:1] + order:
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def primary_key(conn: Connection, table: str) -> List[str]:
+    """Columns of the primary key of a table, lowercase."""
+    try:
+        columns = inspect(conn).get_pk_constraint(table).get('constrained_columns') or []
+    except SQLAlchemyError:
+        return []
+    return [column.lower() for column in columns]
+
+
+def suggest_index(conn: Connection, db_type: str, table: str, columns: List[str]) -> Optional[str]:
+    """CREATE INDEX statement for the dialect of the connection.
+
+    None when the columns start with the whole primary key, the lookup already
+    finds a single row through it.
+    """
+    pk_columns = primary_key(conn, table)
+    leading = {column.lower() for column in columns[:len(pk_columns)]}
+    if not columns or (pk_columns and leading == set(pk_columns)):
+        return None
+    quote = conn.dialect.identifier_preparer.quote
+    name = f"idx_{table}_{'_'.join(columns)}".lower()[:63]
+    exists = "" if db_type == 'mysql' else "IF NOT EXISTS "
+    return f"CREATE INDEX {exists}{quote(name)} ON {quote(table)} ({', '.join(quote(c) for c in columns)});"
+
+
+def advise(name: str, db_url: str, db_type: str, keys: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Explain the statements of a model file and report the missing indexes.
+
+    Args:
+        name: Name of the JSON file containing the queries
+        db_url: SQLAlchemy connection URL of the database with the project schema
+        db_type: Database type used to resolve the @dialect aliases
+        keys: Query keys to check (default: all)
+
+    Returns:
+        List of findings, dictionaries with name, key, index (position in a
+        transaction), problem, table, detail, suggestion and expected (a full
+        scan of a query declared with "@scan"). Statements that can not be
+        explained are reported with problem 'ERROR'.
+    """
+    findings = []
+    engine = get_engine(db_url)
+    for key, content in model_registry.statements(name, db_type).items():
+        if keys and key not in keys:
+            continue
+        statements = content if isinstance(content, list) else [content]
+        for index, statement in enumerate(statements):
+            if not isinstance(statement, Statement):
+                continue
+            # Only INSERT ... SELECT reads tables
+            if statement.operation not in ("SELECT", "UPDATE", "DELETE") and \
+                    not re.search(r'\bSELECT\b', statement.sql, re.IGNORECASE):
+                continue
+
+            finding = {'name': name, 'key': key, 'index': index if isinstance(content, list) else None}
+            with engine.connect() as conn:
+                try:
+                    with conn.begin() as trans:
+                        plan = explain(conn, db_type, statement)
+                        trans.rollback()
+                except SQLAlchemyError as e:
+                    findings.append({**finding, 'problem': 'ERROR', 'table': None, 'expected': False,
+                                     'detail': str(e).split('\n', maxsplit=1)[0], 'suggestion': None})
+                    continue
+
+                aliases = table_aliases(statement.sql)
+                for problem, table, detail in plan_problems(db_type, plan):
+                    table = aliases.get((table or '').lower(), table)
+                    if table is None and len(set(aliases.values())) == 1:
+                        table = next(iter(aliases.values()))
+                    expected = problem == FULL_SCAN and statement.scan
+                    columns = index_columns(statement.sql, table) if table and not expected else []
+                    findings.append({
+                        **finding,
+                        'problem': problem,
+                        'table': table,
+                        'detail': detail,
+                        'suggestion': suggest_index(conn, db_type, table, columns) if columns else None,
+                        'expected': expected
+                    })
+    return findings
@@ -0,0 +1,265 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""In-memory Bloom filter of the hashed logins, for User.check_login().
+
+Logins that are surely not in the user table are rejected without running the
+get-by-login query, which protects the database from credential stuffing with
+unknown logins. The filter has no false negatives for the users it has seen and
+about Config.LOGIN_FILTER_ERROR_RATE false positives, that just run the query.
+
+Enabled with Config.LOGIN_FILTER. The filter is built with a streaming scan of
+the user table at startup and the users created by this process are added at
+once. The users created by other processes are added reading the ones created
+since the newest user seen (the created column, indexed by
+create_login_index(), is the version marker of the filter): in the background
+every Config.LOGIN_FILTER_REFRESH seconds, and before a login missing from the
+filter is rejected, so a login is only rejected by a filter that has read the
+users committed before it was asked for. Every Config.LOGIN_FILTER_REBUILD
+seconds, or when it is full, the filter is built again to drop the deleted
+users. Until the first build, or if the new users can not be read, every login
+is allowed through.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import Config
+from utils.stats import register_stats
+from .model import Model
+
+logger = logging.getLogger(__name__)
+
+# Smallest number of logins the filter is sized for
+MIN_CAPACITY = 1024
+
+# Seconds before the newest user seen that are read again on each refresh, for
+# the signups committed late and the clocks of the other servers
+LOOKBACK = 300
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings.
+
+    Attributes:
+        capacity: Items it is sized for with the error rate
+        size: Number of bits
+        hashes: Bits set per item
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, MIN_CAPACITY)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.items = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        """Add an item, an item already in the filter is not counted again."""
+        new = False
+        for pos in self._positions(item):
+            if not self._bits[pos >> 3] & (1 << (pos & 7)):
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+                new = True
+        if new:
+            self.items += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class LoginFilter:
+    """Bloom filter of the user logins, updated with the new users of the user table.
+
+    Attributes:
+        error_rate: False positive rate the filter is sized for
+        refresh: Seconds between the reads of the new users
+        rebuild: Seconds between the full builds
+    """
+
+    def __init__(self, error_rate: float, refresh: int, rebuild: int):
+        self.error_rate = error_rate
+        self.refresh = refresh
+        self.rebuild = rebuild
+        self._bloom: Optional[BloomFilter] = None
+        self._marker = 0
+        self._built: Optional[float] = None
+        self._added: Optional[List[str]] = None
+        self._checked: Optional[float] = None
+        self._updated: Optional[float] = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._stats = {
+            'checks': 0, 'rejected': 0, 'builds': 0, 'updates': 0, 'errors': 0, 'build_seconds': 0.0
+        }
+
+    def might_exist(self, login: str) -> bool:
+        """False if the hashed login is surely not in the user table."""
+        if self._checked is None or time.monotonic() - self._checked >= self.refresh:
+            self.refresh_async()
+
+        self._stats['checks'] += 1
+        bloom = self._bloom
+        if bloom is None or login in bloom:
+            return True
+
+        # A user created by another process may be missing, read the new users
+        # with an update started after this check, the waiting misses share it
+        missed = time.monotonic()
+        with self._update_lock:
+            if self._updated is None or self._updated < missed:
+                if not self._update(Model(Config.DB_PWA, Config.DB_PWA_TYPE)):
+                    return True
+
+        if login in self._bloom:
+            return True
+        self._stats['rejected'] += 1
+        return False
+
+    def add(self, login: str) -> None:
+        """Add the hashed login of a user created by this process."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(login)
+            if self._added is not None:
+                self._added.append(login)
+
+    def refresh_async(self) -> None:
+        """Check the filter in a background thread, unless a check is already running."""
+        if self._build_lock.locked():
+            return
+        self._checked = time.monotonic()
+        threading.Thread(target=self.check, name="login-filter", daemon=True).start()
+
+    def check(self) -> None:
+        """Add the new users to the filter, or build it again if it is due or full."""
+        if not self._build_lock.acquire(blocking=False):
+            return
+        try:
+            model = Model(Config.DB_PWA, Config.DB_PWA_TYPE)
+            bloom = self._bloom
+            if (bloom is None or bloom.items > bloom.capacity
+                    or time.monotonic() - self._built >= self.rebuild):
+                self._build(model)
+            else:
+                with self._update_lock:
+                    self._update(model)
+        finally:
+            self._checked = time.monotonic()
+            self._build_lock.release()
+
+    def _update(self, model: Model) -> bool:
+        """Add the users created since the marker, with self._update_lock held.
+
+        Returns:
+            False if they could not be read
+        """
+        started = time.monotonic()
+        marker = self._marker
+        for row in model.exec_iter('user', 'new-logins', {'since': self._marker - LOOKBACK}):
+            self.add(row.login)
+            marker = max(marker, row.created or 0)
+
+        if model.has_error:
+            self._stats['errors'] += 1
+            logger.error("Login filter update failed: %s", model.last_error)
+            return False
+        self._marker = max(self._marker, marker)
+        self._updated = started
+        self._stats['updates'] += 1
+        return True
+
+    def _build(self, model: Model) -> None:
+        start = time.perf_counter()
+        result = model.exec('user', 'count')
+        if model.has_error:
+            self._stats['errors'] += 1
+            logger.error("Login filter build failed: %s", model.last_error)
+            return
+
+        with self._lock:
+            self._added = []
+
+        # Sized for twice the users so the new ones fit until the next rebuild
+        bloom = BloomFilter(2 * result['rows'][0][0], self.error_rate)
+        marker = 0
+        for row in model.exec_iter('user', 'all-logins'):
+            bloom.add(row.login)
+            marker = max(marker, row.created or 0)
+
+        with self._lock:
+            added, self._added = self._added, None
+            if model.has_error:
+                self._stats['errors'] += 1
+                logger.error("Login filter build failed: %s", model.last_error)
+                return
+            # The users created during the scan may be missing from it
+            for login in added:
+                bloom.add(login)
+            self._bloom = bloom
+            self._marker = max(self._marker, marker)
+            self._built = time.monotonic()
+            self._stats['builds'] += 1
+            self._stats['build_seconds'] = round(time.perf_counter() - start, 3)
+
+    def stats(self) -> dict:
+        """Counters and size of the filter."""
+        bloom = self._bloom
+        return {
+            **self._stats,
+            'ready': bloom is not None,
+            'items': bloom.items if bloom else 0,
+            'capacity': bloom.capacity if bloom else 0,
+            'bytes': (bloom.size + 7) // 8 if bloom else 0,
+            'hashes': bloom.hashes if bloom else 0
+        }
+
+    def _after_fork_in_child(self) -> None:
+        """The child keeps the filter, a build in progress in the parent is not its own."""
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._added = None
+        self._checked = None
+
+
+def create_login_index() -> bool:
+    """Create the index of the created column of the user table if it has none."""
+    model = Model(Config.DB_PWA, Config.DB_PWA_TYPE)
+    try:
+        indexes = inspect(model.engine).get_indexes('user')
+    except SQLAlchemyError as e:
+        logger.error("Can not read the indexes of the user table: %s", e)
+        return False
+    if any(index['column_names'][:1] == ['created'] for index in indexes):
+        return True
+
+    model.exec('user', 'create-created-index')
+    if model.has_error:
+        logger.error("Can not create the index of user.created: %s", model.last_error)
+        return False
+    return True
+
+
+login_filter = LoginFilter(
+    Config.LOGIN_FILTER_ERROR_RATE, Config.LOGIN_FILTER_REFRESH, Config.LOGIN_FILTER_REBUILD
+)
+
+register_stats('login_filter', login_filter.stats)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=login_filter._after_fork_in_child)  # pylint: disable=protected-access
@@ -0,0 +1,346 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Database independent part of Model and AsyncModel.
+
+Everything that does no I/O is here, shared by both classes: statement lookup,
+error reporting, query cache keys, read routing and building the results.
+Model and AsyncModel only run the statements, with and without asyncio.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from flask import current_app
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.config import Config
+from .engine import next_replica_url
+from .model_cache import params_key, query_cache
+from .model_registry import DEFAULT_TYPE, Statement, get_operation_type, model_registry
+from .model_rows import compact_result
+from .unit_of_work import current_unit_of_work
+
+
+class ModelBase:
+    """Statement lookup, errors, cache and results of the models.
+
+    Attributes:
+        db_url: SQLAlchemy connection URL of the primary database
+        db_type: Database type used to resolve the @dialect aliases
+        last_error: Detailed technical error message for debugging
+        user_error: User-friendly error message
+        has_error: Flag indicating if there's an error
+        error_code: Error code for error identification
+    """
+    DEFAULT_TYPE = DEFAULT_TYPE
+
+    def __init__(self, db_url: str, db_type: str):
+        self.db_type = db_type
+        self.db_url = db_url
+        self.last_error = None          # Detailed technical error (for logs/debug)
+        self.user_error = None          # Safe message to show to user
+        self.has_error = False          # Flag to indicate if there's an error
+        self.error_code = None          # Error code for identification
+        self._cache_hit = False         # Last exec() was served from the query cache
+        self._read_primary = False      # Reads go to the primary after a write
+
+    def get_last_error(self) -> dict:
+        """Get the last model error."""
+        error_msg = self.user_error or 'Failed.'
+        if current_app.debug:
+            error_msg = self.last_error or 'Failed.'
+        return {
+            'success': False,
+            'error': self.error_code or 'FAILED',
+            'message': error_msg
+        }
+
+    def clear_error(self) -> None:
+        """Reset all error-related attributes to their default state."""
+        self.last_error = None
+        self.user_error = None
+        self.has_error = False
+        self.error_code = None
+
+    def _set_error(
+        self,
+        technical_msg: str,
+        user_msg: str,
+        error_code: str = None
+    ) -> None:
+        """Set error information with technical and user-friendly messages.
+
+        Args:
+            technical_msg: Detailed error message for debugging purposes
+            user_msg: User-friendly error message that can be safely displayed
+            error_code: Optional error code for error identification
+        """
+        self.has_error = True
+        self.last_error = technical_msg
+        self.user_error = user_msg
+        self.error_code = error_code
+
+    def _database_error(self, error: Exception) -> None:
+        """Report the error of a single statement."""
+        if isinstance(error, SQLAlchemyError):
+            self._set_error(
+                f"SQL error: {str(error)}",
+                "Database operation error.",
+                "DATABASE_ERROR"
+            )
+        else:
+            self._set_error(
+                f"Parameter error: {str(error)}",
+                "Invalid data. Please check the information entered.",
+                "INVALID_DATA"
+            )
+
+    def _transaction_error(self, error: Exception) -> None:
+        """Report the error of a transaction, CONSTRAINT_ERROR for a constraint violation."""
+        if isinstance(error, SQLAlchemyError):
+            self._set_error(
+                f"Transaction failed: {str(error)}",
+                "Transaction error. Changes were not saved.",
+                "CONSTRAINT_ERROR" if isinstance(error, IntegrityError) else "TRANSACTION_ERROR"
+            )
+        else:
+            self._set_error(
+                f"Transaction parameter error: {str(error)}",
+                "Invalid data in transaction.",
+                "TRANSACTION_DATA_ERROR"
+            )
+
+    def _compact(self, result):
+        """Result of exec() with the rows of the SELECT statements as compact rows."""
+        if isinstance(result, list):
+            return [self._compact(res) for res in result]
+        if isinstance(result, dict) and result.get('operation') == "SELECT":
+            return compact_result(result)
+        return result
+
+    def _get_sql_content(self, name: str, key: str) -> Union[Statement, List[Statement], Any, None]:
+        """Get the compiled statement or transaction for a query from the model registry.
+
+        Args:
+            name: Name of the JSON file containing the queries
+            key: Key of the specific query
+
+        Returns:
+            The compiled SQL content or None if there was an error
+        """
+        file_path = model_registry.path(name)
+        try:
+            sql_content = model_registry.get(name, key, self.db_type)
+        except (FileNotFoundError, PermissionError) as e:
+            self._set_error(
+                f"File access error for {file_path}: {str(e)}",
+                "System configuration error. Please contact administrator.",
+                "FILE_ACCESS_ERROR"
+            )
+            return None
+        except json.JSONDecodeError as e:
+            self._set_error(
+                f"Invalid JSON in {file_path}: {str(e)}",
+                "System configuration error. Please contact administrator.",
+                "CONFIG_ERROR"
+            )
+            return None
+
+        # Check if the key exists in the JSON content
+        if not sql_content:
+            self._set_error(
+                f"Key '{key}' not found in {file_path}",
+                "Operation not available. Please contact administrator.",
+                "OPERATION_NOT_FOUND"
+            )
+            return None
+
+        return sql_content
+
+    def _invalid_content(self, key: str) -> None:
+        """Report a model entry that is neither a statement nor a transaction."""
+        self._set_error(
+            f"Invalid SQL content type for key '{key}'",
+            "Configuration error. Please contact administrator.",
+            "INVALID_CONFIG"
+        )
+
+    def _many_statement(self, name: str, key: str) -> Optional[Statement]:
+        """Single writing statement for exec_many(), None if there was an error."""
+        statement = self._get_sql_content(name, key)
+        if statement is not None and (not isinstance(statement, Statement) or statement.operation == "SELECT"):
+            self._set_error(
+                f"Key '{key}' must be a single writing statement for exec_many",
+                "Configuration error. Please contact administrator.",
+                "INVALID_CONFIG"
+            )
+            return None
+        return statement
+
+    def _iter_statement(self, name: str, key: str) -> Optional[Statement]:
+        """Single SELECT statement for exec_iter(), None if there was an error."""
+        statement = self._get_sql_content(name, key)
+        if statement is not None and (not isinstance(statement, Statement) or statement.operation != "SELECT"):
+            self._set_error(
+                f"Key '{key}' must be a single SELECT statement for exec_iter",
+                "Configuration error. Please contact administrator.",
+                "INVALID_CONFIG"
+            )
+            return None
+        return statement
+
+    def _transaction_params(self, statements: List[Statement], params_list: List[Dict] = None) -> Optional[List]:
+        """Parameters of each statement of a transaction, None if they do not match."""
+        if params_list and len(params_list) != len(statements):
+            self._set_error(
+                "Number of parameters doesn't match number of statements",
+                "Error in transaction data.",
+                "TRANSACTION_PARAM_ERROR"
+            )
+            return None
+        return params_list or [{}] * len(statements)
+
+    def _cache_key(self, name: str, key: str, params: Dict[str, Any] = None) -> Optional[tuple]:
+        """Query cache key of a SELECT, None if its parameters can not be hashed."""
+        params_hash = params_key(params)
+        if params_hash is None:
+            return None
+        return (self.db_url, self.db_type, name, key, params_hash)
+
+    def _cached_result(self, cache_key: tuple) -> Optional[Dict[str, Any]]:
+        """Copy of a cached result, None if it is not cached."""
+        result = query_cache.get_result(cache_key)
+        if result is None:
+            return None
+        self._cache_hit = True
+        return {**result, 'rows': list(result['rows'])}
+
+    def _store_result(self, cache_key: tuple, statement: Statement, result: Optional[Dict[str, Any]]) -> None:
+        """Cache a result, unless the request has batched writes not committed yet."""
+        if result is None or not (result['rows'] or statement.cache.get('empty', True)):
+            return
+        uow = current_unit_of_work()
+        if not (uow and uow.dirty):
+            query_cache.set_result(
+                cache_key,
+                {**result, 'rows': list(result['rows'])},
+                statement.cache.get('ttl', Config.MODEL_CACHE_TTL),
+                self.db_url,
+                statement.cache.get('tables', [])
+            )
+
+    def _invalidate_cache(self, tables) -> None:
+        """Drop the cached results that read any of the tables written."""
+        tables = tuple(tables)
+        if tables:
+            query_cache.invalidate(self.db_url, tables)
+            uow = current_unit_of_work()
+            if uow is not None and uow.batch_writes:
+                uow.written(self.db_url, tables)
+
+    def _read_url(self) -> str:
+        """Database for a read: a replica, or the primary after a write to the database."""
+        if self._read_primary:
+            return self.db_url
+        uow = current_unit_of_work()
+        if uow is not None and uow.is_pinned(self.db_url):
+            return self.db_url
+        return next_replica_url(self.db_url) or self.db_url
+
+    def _pin_primary(self) -> None:
+        """Read your writes: send the next reads of the database to the primary."""
+        self._read_primary = True
+        uow = current_unit_of_work()
+        if uow is not None:
+            uow.pin(self.db_url)
+
+    def _many_result(self, statement: Statement, chunks: List[int]) -> Dict[str, Any]:
+        """Build the result dictionary of exec_many()."""
+        rowcount = sum(chunks)
+        return {
+            'success': rowcount > 0,
+            'rowcount': rowcount,
+            'operation': statement.operation or 'OTHER',
+            'chunks': chunks
+        }
+
+    def _single_result(self, statement: Statement, result: CursorResult) -> Dict[str, Any]:
+        """Build the result dictionary of a single statement.
+
+        Args:
+            statement: Compiled SQL statement executed
+            result: Result of the execution
+
+        Returns:
+            Dictionary containing operation results
+        """
+        operation = statement.operation
+        if operation == "SELECT":
+            rows = result.fetchall()
+            return {
+                'success': True,
+                'operation': operation,
+                'columns': result.keys(),
+                'rows': rows,
+                'rowcount': len(rows)
+            }
+        elif operation:
+            return {
+                'success': result.rowcount > 0,
+                'rowcount': result.rowcount,
+                'operation': operation,
+                'lastrowid': result.lastrowid if operation == "INSERT" else None
+            }
+        else:
+            return {'success': True, 'operation': 'OTHER'}
+
+    def _transaction_result(self, index: int, statement: Statement, result: CursorResult) -> Dict[str, Any]:
+        """Build the result dictionary of a statement inside a transaction.
+
+        Args:
+            index: Position of the statement in the transaction
+            statement: Compiled SQL statement executed
+            result: Result of the execution
+
+        Returns:
+            Dictionary containing operation results
+        """
+        operation = statement.operation
+        if operation == "SELECT":
+            rows = result.fetchall()
+            return {
+                'success': True,
+                'operation': operation,
+                'statement_index': index,
+                'columns': result.keys(),
+                'rows': rows,
+                'rowcount': len(rows)
+            }
+        elif operation:
+            res = {
+                'success': result.rowcount > 0,
+                'rowcount': result.rowcount,
+                'operation': operation,
+                'statement_index': index
+            }
+            if operation == "INSERT":
+                res['lastrowid'] = result.lastrowid
+            return res
+        else:
+            return {
+                'success': True,
+                'operation': 'OTHER',
+                'statement_index': index
+            }
+
+    def _get_operation_type(self, sql: str) -> Optional[str]:
+        """Determine the type of SQL operation from a SQL statement.
+
+        Args:
+            sql: SQL statement to analyze
+
+        Returns:
+            The type of operation ('SELECT', 'INSERT', 'UPDATE', 'DELETE') or None
+        """
+        return get_operation_type(sql)
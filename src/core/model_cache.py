@@ -0,0 +1,87 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Result cache for the model queries with table-tagged invalidation.
+
+A query opts in from its model JSON file with a "@cache" entry:
+
+    "get": {
+        "@portable": "SELECT ... FROM session WHERE ...",
+        "@cache": {"ttl": 10, "tables": ["session"]}
+    }
+
+Writes executed through Model to any of those tables in the same database
+invalidate the cached results. The cache is per process, so the TTL bounds
+how long other processes may serve a result after a write. With "empty": false
+the results without rows are not cached, so a row inserted by another process
+is found at once.
+"""
+
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from app.config import Config
+from utils.lru_cache import LRUCache
+from utils.stats import register_stats
+
+
+class QueryCache(LRUCache):
+    """LRU cache of query results indexed by the tables they read."""
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self._tags: Dict[Tuple[str, str], Set[Hashable]] = {}
+        self.invalidations = 0
+
+    def set_result(self, key: Hashable, result: Any, ttl: float, db_url: str, tables: Iterable[str]) -> None:
+        """Cache a result tagged with the tables it reads."""
+        tags = tuple((db_url, table.lower()) for table in tables)
+        with self._lock:
+            self.set(key, (tags, result), ttl)
+            if key in self._data:
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+
+    def get_result(self, key: Hashable) -> Optional[Any]:
+        """Get a cached result or None."""
+        entry = self.get(key)
+        return entry[1] if entry else None
+
+    def invalidate(self, db_url: str, tables: Iterable[str]) -> None:
+        """Drop the cached results that read any of the tables."""
+        with self._lock:
+            for table in tables:
+                keys = self._tags.pop((db_url, table.lower()), None)
+                for key in keys or ():
+                    if key in self._data:
+                        self.invalidations += 1
+                        self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**super().stats(), 'invalidations': self.invalidations}
+
+    def _remove(self, key) -> None:
+        tags, _ = self._data[key][1]
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        super()._remove(key)
+
+
+def params_key(params: Optional[Dict[str, Any]]) -> Optional[Hashable]:
+    """Hashable key for the query parameters, None if they can not be cached."""
+    if not params:
+        return ()
+    try:
+        key = tuple(sorted(params.items()))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+query_cache = QueryCache(Config.MODEL_CACHE_SIZE)
+
+register_stats('query_cache', query_cache.stats)
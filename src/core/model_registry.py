@@ -0,0 +1,221 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Compiled in-memory registry of the JSON-defined SQL queries.
+
+All the files in Config.MODEL_DIR are loaded once, the @dialect aliases are
+resolved per database type and the text() statements and their operation type
+are built only once, so Model.exec() does not touch the disk on each query.
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+from app.config import Config
+
+DEFAULT_TYPE = '@portable'
+CACHE_KEY = '@cache'
+# Queries that read whole tables on purpose, not reported by the index advisor
+SCAN_KEY = '@scan'
+
+WRITE_TABLE = re.compile(
+    r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+|IGNORE\s+)?INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[`"\[]?(\w+)',
+    re.IGNORECASE
+)
+
+
+def get_operation_type(sql: str) -> Optional[str]:
+    """Determine the type of SQL operation from a SQL statement.
+
+    Args:
+        sql: SQL statement to analyze
+
+    Returns:
+        The type of operation ('SELECT', 'INSERT', 'UPDATE', 'DELETE') or None
+    """
+    sql_upper = sql.strip().upper()
+    if sql_upper.startswith("INSERT"):
+        return "INSERT"
+    elif sql_upper.startswith("UPDATE"):
+        return "UPDATE"
+    elif sql_upper.startswith("DELETE"):
+        return "DELETE"
+    elif sql_upper.startswith("SELECT"):
+        return "SELECT"
+    return None
+
+
+class Statement:
+    """A SQL statement ready to be executed.
+
+    Attributes:
+        sql: SQL text as defined in the model file
+        clause: Prebuilt text() clause
+        operation: 'SELECT', 'INSERT', 'UPDATE', 'DELETE' or None
+        tables: Tables written by the statement, used to invalidate the query cache
+        cache: "@cache" options of the query ({"ttl": ..., "tables": [...], "empty": ...}) or None
+        scan: The query is declared with "@scan": true, its full table scans are expected
+    """
+
+    __slots__ = ('sql', 'clause', 'operation', 'tables', 'cache', 'scan')
+
+    def __init__(self, sql: str, cache: Optional[Dict[str, Any]] = None, scan: bool = False):
+        self.sql: str = sql
+        self.clause: TextClause = text(sql)
+        self.operation: Optional[str] = get_operation_type(sql)
+        match = WRITE_TABLE.match(sql)
+        self.tables: tuple = (match.group(1),) if match else ()
+        self.cache = cache if self.operation == "SELECT" else None
+        self.scan = bool(scan)
+
+    def __repr__(self):
+        return f"Statement({self.operation}, {self.sql!r})"
+
+
+class ModelRegistry:
+    """Registry of the model JSON files compiled per database type.
+
+    Attributes:
+        model_dir: Directory with the model JSON files
+        auto_reload: Reload a file when its modification time changes (debug)
+    """
+
+    def __init__(self, model_dir: str):
+        self.model_dir = model_dir
+        self.auto_reload = False
+        self._lock = threading.RLock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._errors: Dict[str, Exception] = {}
+        self._compiled: Dict[tuple, Dict[str, Any]] = {}
+
+    def path(self, name: str) -> str:
+        """Path of the JSON file for a model name."""
+        return f"{self.model_dir}/{name}.json"
+
+    def load(self, db_types=(), auto_reload: bool = False) -> None:
+        """Load all the model files and compile them for the given database types.
+
+        Args:
+            db_types: Database types to compile the statements for, e.g. ('sqlite',)
+            auto_reload: Reload the files when they change on disk
+        """
+        with self._lock:
+            self.auto_reload = auto_reload
+            self._files.clear()
+            self._mtimes.clear()
+            self._errors.clear()
+            self._compiled.clear()
+
+            for filename in sorted(os.listdir(self.model_dir)):
+                if filename.endswith(".json"):
+                    self._load_file(filename[:-5])
+
+            for name in list(self._files):
+                for db_type in db_types:
+                    self._compile(name, db_type)
+
+    def get(
+        self,
+        name: str,
+        key: str,
+        db_type: str
+    ) -> Union[Statement, List[Statement], Any, None]:
+        """Get the compiled statement (or list of statements) for a query.
+
+        Args:
+            name: Name of the JSON file containing the queries
+            key: Key of the specific query
+            db_type: Database type used to resolve the @dialect aliases
+
+        Returns:
+            Statement, list of Statement for transactions, the raw value if it
+            is not a valid SQL definition, or None if the key does not exist.
+
+        Raises:
+            FileNotFoundError, PermissionError: The model file can not be read
+            json.JSONDecodeError: The model file is not valid JSON
+        """
+        compiled = self._compiled.get((name, db_type))
+
+        if compiled is None or (self.auto_reload and self._is_modified(name)):
+            with self._lock:
+                if self.auto_reload and self._is_modified(name):
+                    self._load_file(name)
+                elif name not in self._files and name not in self._errors:
+                    self._load_file(name)
+                compiled = self._compile(name, db_type)
+
+        return compiled.get(key)
+
+    def names(self) -> List[str]:
+        """Names of the model files in the model directory."""
+        return sorted(filename[:-5] for filename in os.listdir(self.model_dir) if filename.endswith(".json"))
+
+    def statements(self, name: str, db_type: str) -> Dict[str, Any]:
+        """All the compiled queries of a model file by key, see get()."""
+        with self._lock:
+            if name not in self._files and name not in self._errors:
+                self._load_file(name)
+            return dict(self._compile(name, db_type))
+
+    def _is_modified(self, name: str) -> bool:
+        try:
+            return os.path.getmtime(self.path(name)) != self._mtimes.get(name)
+        except OSError:
+            return name in self._files
+
+    def _load_file(self, name: str) -> None:
+        file_path = self.path(name)
+        self._files.pop(name, None)
+        self._errors.pop(name, None)
+        for compiled_key in [k for k in self._compiled if k[0] == name]:
+            del self._compiled[compiled_key]
+
+        try:
+            self._mtimes[name] = os.path.getmtime(file_path)
+            with open(file_path, "r", encoding="utf-8") as file:
+                self._files[name] = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            self._mtimes.pop(name, None)
+            self._errors[name] = e
+
+    def _compile(self, name: str, db_type: str) -> Dict[str, Any]:
+        if name in self._errors:
+            raise self._errors[name]
+
+        if (name, db_type) in self._compiled:
+            return self._compiled[(name, db_type)]
+
+        compiled = {}
+        for key, entry in self._files[name].items():
+            sql_content = self._resolve(entry, db_type) if isinstance(entry, dict) else None
+            scan = entry.get(SCAN_KEY, False) if isinstance(entry, dict) else False
+            if isinstance(sql_content, str):
+                compiled[key] = Statement(sql_content, entry.get(CACHE_KEY), scan) if sql_content else None
+            elif isinstance(sql_content, list):
+                compiled[key] = [Statement(sql, scan=scan) for sql in sql_content] or None
+            else:
+                compiled[key] = sql_content
+
+        self._compiled[(name, db_type)] = compiled
+        return compiled
+
+    def _resolve(self, entry: Dict[str, Any], db_type: str) -> Any:
+        """Resolve the @dialect alias chain of a query entry."""
+        sql_content = entry.get(f"@{db_type}", entry.get(DEFAULT_TYPE, ""))
+        for _ in range(len(entry)):
+            if not (isinstance(sql_content, str) and sql_content.startswith('@')):
+                break
+            sql_content = entry.get(sql_content, "")
+        if isinstance(sql_content, str) and sql_content.startswith('@'):
+            return ""
+        return sql_content
+
+
+model_registry = ModelRegistry(Config.MODEL_DIR)
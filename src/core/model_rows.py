@@ -0,0 +1,74 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Compact rows for the SELECT results of Model.exec(compact=True).
+
+A row is a plain tuple of values. The column names live once in its class,
+shared by all the rows with the same columns, so reading by name does not
+build a dict per row:
+
+    result = model.exec('user', 'get-by-login', {"login": login}, compact=True)
+    row = result['rows'][0]
+    row.userId, row['user_profile.alias'], row.get('user_profile.locale', ''), row[0]
+"""
+
+from typing import Any, Dict, Iterable, Tuple, Type
+
+_classes: Dict[Tuple[str, ...], Type['CompactRow']] = {}
+
+
+class CompactRow(tuple):
+    """Tuple with access by column name, as key, attribute or get().
+
+    With repeated column names the first one is used.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return tuple.__getitem__(self, self._index[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Value of a column, or default if the column does not exist."""
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self) -> Tuple[str, ...]:
+        """Column names."""
+        return self._fields
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {name: tuple.__getitem__(self, index) for name, index in self._index.items()}
+
+    def __repr__(self):
+        return f"CompactRow({self._asdict()!r})"
+
+
+def row_class(columns: Iterable[str]) -> Type[CompactRow]:
+    """Row class shared by all the results with these columns."""
+    columns = tuple(columns)
+    cls = _classes.get(columns)
+    if cls is None:
+        index = {}
+        for position, name in enumerate(columns):
+            index.setdefault(name, position)
+        cls = _classes.setdefault(
+            columns,
+            type('CompactRow', (CompactRow,), {'__slots__': (), '_fields': columns, '_index': index})
+        )
+    return cls
+
+
+def compact_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a SELECT result dictionary with compact rows."""
+    cls = row_class(result['columns'])
+    return {**result, 'columns': cls._fields, 'rows': [cls(row) for row in result['rows']]}
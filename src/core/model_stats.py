@@ -0,0 +1,133 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Per-query statistics and slow query log for the model queries.
+
+Calls, cache hits, errors, rows and a latency histogram are aggregated per
+(file, key, dialect). Queries slower than Config.MODEL_SLOW_QUERY_MS are logged
+with the shape of their parameters, never with their values.
+"""
+
+import logging
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Tuple
+
+from app.config import Config
+from utils.stats import register_stats
+
+# Upper bounds in milliseconds of the latency histogram buckets, plus one for slower
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+logger = logging.getLogger(__name__)
+
+
+def params_shape(params: Any) -> Any:
+    """Parameter names and types, without values, for the logs."""
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        if params and all(isinstance(item, dict) for item in params):
+            shapes = [params_shape(item) for item in params[:3]]
+            return shapes if len(params) <= 3 else shapes + [f"... {len(params)} items"]
+        return f"{type(params).__name__}[{len(params)}]"
+    return type(params).__name__
+
+
+def result_rows(result: Any) -> int:
+    """Rows returned or affected by an exec() result."""
+    if isinstance(result, dict):
+        return max(result.get('rowcount') or 0, 0)
+    if isinstance(result, list):
+        return sum(max(res.get('rowcount') or 0, 0) for res in result)
+    return 0
+
+
+class QueryStats:
+    """Thread-safe aggregation of the model query executions."""
+
+    def __init__(self, slow_query_ms: int):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+    def record(
+        self,
+        name: str,
+        key: str,
+        dialect: str,
+        elapsed: float,
+        result: Any,
+        error: bool,
+        params: Any = None,
+        cached: bool = False
+    ) -> None:
+        """Record one execution.
+
+        Args:
+            name: Model file name
+            key: Query key
+            dialect: Database type
+            elapsed: Seconds spent
+            result: Value returned by exec()
+            error: The execution failed
+            params: Parameters, only their shape is logged
+            cached: The result came from the query cache
+        """
+        elapsed_ms = elapsed * 1000
+        rows = result_rows(result)
+
+        with self._lock:
+            stats = self._stats.get((name, key, dialect))
+            if stats is None:
+                stats = self._stats[(name, key, dialect)] = {
+                    'calls': 0,
+                    'cache_hits': 0,
+                    'errors': 0,
+                    'rows': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1)
+                }
+
+            stats['calls'] += 1
+            stats['rows'] += rows
+            if error:
+                stats['errors'] += 1
+            if cached:
+                stats['cache_hits'] += 1
+            else:
+                stats['total_ms'] += elapsed_ms
+                stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+                stats['histogram'][bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+        if self.slow_query_ms and elapsed_ms >= self.slow_query_ms and not cached:
+            logger.warning(
+                "Slow query %s/%s @%s: %.1f ms, %d rows, params %s",
+                name, key, dialect, elapsed_ms, rows, params_shape(params)
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregated statistics by "file/key@dialect"."""
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            snapshot = {}
+            for (name, key, dialect), stats in sorted(self._stats.items()):
+                executed = stats['calls'] - stats['cache_hits']
+                snapshot[f"{name}/{key}@{dialect}"] = {
+                    **{k: v for k, v in stats.items() if k != 'histogram'},
+                    'total_ms': round(stats['total_ms'], 3),
+                    'max_ms': round(stats['max_ms'], 3),
+                    'avg_ms': round(stats['total_ms'] / executed, 3) if executed else 0.0,
+                    'histogram': dict(zip(labels, stats['histogram']))
+                }
+            return snapshot
+
+    def reset(self) -> None:
+        """Forget all the recorded statistics."""
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStats(Config.MODEL_SLOW_QUERY_MS)
+
+register_stats('model', query_stats.snapshot)
@@ -1,6 +1,5 @@
 """Fill the schema with default values"""
 
-import copy
 from http.cookies import SimpleCookie
 
 import woothee
@@ -8,8 +7,50 @@ from flask import current_app
 
 from app.config import Config
 from constants import *  # pylint: disable=wildcard-import,unused-wildcard-import
+from utils.layered_dict import LayeredDict
+from utils.lru_cache import LRUCache
+from utils.stats import register_stats
 from utils.utils import get_ip, merge_dict
 
+# Longer header values are parsed every time instead of filling the caches
+MAX_CACHED_HEADER = 512
+
+_MISSING = object()
+
+ua_cache = LRUCache(Config.UA_CACHE_SIZE)
+language_cache = LRUCache(Config.LANGUAGE_CACHE_SIZE)
+
+register_stats('ua_cache', ua_cache.stats)
+register_stats('language_cache', language_cache.stats)
+
+
+def parse_ua(user_agent: str) -> dict:
+    """woothee.parse() of a User-Agent, parsed once per distinct value."""
+    if user_agent and len(user_agent) > MAX_CACHED_HEADER:
+        return woothee.parse(user_agent)
+
+    parsed = ua_cache.get(user_agent)
+    if parsed is None:
+        parsed = woothee.parse(user_agent)
+        ua_cache.set(user_agent, parsed)
+
+    # The request schema gets its own copy
+    return dict(parsed)
+
+
+def best_language(req, languages: list) -> str | None:
+    """Accept-Language best_match() of the request, negotiated once per distinct header."""
+    header = req.headers.get('Accept-Language', '')
+    if len(header) > MAX_CACHED_HEADER:
+        return req.accept_languages.best_match(languages)
+
+    key = (header, tuple(languages))
+    language = language_cache.get(key, _MISSING)
+    if language is _MISSING:
+        language = req.accept_languages.best_match(languages)
+        language_cache.set(key, language)
+    return language
+
 
 class Schema:
     """Schema"""
@@ -29,7 +70,8 @@ class Schema:
         self.set_theme()
 
     def _default(self) -> None:
-        self.properties = copy.deepcopy(current_app.components.schema)
+        # The shared schema of the components is only copied where the request reads or writes it
+        self.properties = LayeredDict(current_app.components.schema)
         self.data = self.properties['data']
         self.local_data = self.properties['inherit']['data']
         self.properties['config']['cache_disable'] = Config.NEUTRAL_CACHE_DISABLE
@@ -70,7 +112,7 @@ class Schema:
         self.data['CONTEXT']['METHOD'] = self.req.method
         self.data['CONTEXT']['REMOTE_ADDR'] = get_ip()
         self.data['CONTEXT']['PATH'] = self.req.path
-        self.data['CONTEXT']['UA'] = woothee.parse(self.req.headers.get('User-Agent'))
+        self.data['CONTEXT']['UA'] = parse_ua(self.req.headers.get('User-Agent'))
 
         for key, value in self.req.args.items():
             self.data['CONTEXT']['GET'][key] = value
@@ -100,7 +142,7 @@ class Schema:
         self.properties['inherit']['locale']['current'] = (
             self.data['CONTEXT']['GET'].get(Config.LANG_KEY)
             or self.data['CONTEXT']['COOKIES'].get(Config.LANG_KEY)
-            or self.req.accept_languages.best_match(languages)
+            or best_language(self.req, languages)
             or ""
         )
 
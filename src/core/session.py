@@ -2,38 +2,97 @@
 
 import json
 import secrets
+import threading
+import time
+from sqlalchemy.engine import make_url
 from app.config import Config
 from constants import * # pylint: disable=wildcard-import,unused-wildcard-import
+from utils.lru_cache import LRUCache
+from utils.sbase64url import sbase64url_sha256
+from utils.stats import register_stats
 from .model import Model
+from .session_shards import shard_url
+from .write_behind import WriteBehindBuffer
+
+_touch_buffers = {}
+_touch_lock = threading.Lock()
+
+
+def session_touches(db_url: str, db_type: str = Config.DB_SAFE_TYPE) -> WriteBehindBuffer:
+    """Buffer of the touch writes of the sessions of a database, see Session.update()."""
+    with _touch_lock:
+        if db_url not in _touch_buffers:
+            if db_url in Config.DB_SAFE_SHARDS:
+                label = f"session/update@shard{Config.DB_SAFE_SHARDS.index(db_url)}"
+            elif db_url == Config.DB_SAFE:
+                label = 'session/update'
+            else:
+                label = f"session/update@{make_url(db_url).render_as_string(hide_password=True)}"
+            _touch_buffers[db_url] = WriteBehindBuffer(
+                lambda: Model(db_url, db_type),
+                'session', 'update', 'sessionId',
+                Config.SESSION_TOUCH_FLUSH_SECONDS,
+                Config.SESSION_TOUCH_MAX_PENDING,
+                label
+            )
+        return _touch_buffers[db_url]
+
+
+# Validated session rows by hash of the session ID, see Session.get()
+session_cache = LRUCache(Config.SESSION_CACHE_SIZE, Config.SESSION_CACHE_TTL)
+
+register_stats('session_cache', session_cache.stats)
 
 
 class Session:
-    """session"""
+    """session
+
+    With shards (default: Config.DB_SAFE_SHARDS) each session is stored in the
+    database its ID hashes to, see core.session_shards.
+    """
 
-    def __init__(self, session_id, db_url=Config.DB_SAFE, db_type=Config.DB_SAFE_TYPE):
+    def __init__(self, session_id, db_url=Config.DB_SAFE, db_type=Config.DB_SAFE_TYPE, shards=None):
         """session"""
         self.model = Model(db_url, db_type)
         self._session_id = session_id
+        self._shards = Config.DB_SAFE_SHARDS if shards is None else shards
+        self._shard_models = {}
+
+    def _model(self, session_token) -> Model:
+        """Model of the database where a session is stored."""
+        if not self._shards:
+            return self.model
+        db_url = shard_url(session_token, self._shards)
+        if db_url not in self._shard_models:
+            self._shard_models[db_url] = Model(db_url, self.model.db_type)
+        return self._shard_models[db_url]
 
     def get(self) -> tuple[str | None, dict]:
         """get session"""
         if not self._session_id:
             return None, {}
 
-        result = self.model.exec('session', 'get', {
-            "sessionId": self._session_id,
-            "open": Config.SESSION_OPEN['true'],
-            "now": NOW
-        })
+        now = int(time.time())
+        cache_key = sbase64url_sha256(self._session_id)
+        row = session_cache.get(cache_key)
+        if row is None or row[5] <= now:
+            result = self._model(self._session_id).exec('session', 'get', {
+                "sessionId": self._session_id,
+                "open": Config.SESSION_OPEN['true'],
+                "now": now
+            })
 
-        if not result.get('rows') or not result['rows'][0]:
-            return None, {}
+            if not result.get('rows') or not result['rows'][0]:
+                return None, {}
 
-        modified = result['rows'][0][4]
-        expire = result['rows'][0][5]
+            row = result['rows'][0]
+            session_cache.set(cache_key, row)
+
+        modified = row[4]
+        expire = row[5]
 
         # Update session if modified more than 15 minutes ago
-        if (NOW - modified) > (SECONDS_MINUTE * 15):
+        if (now - modified) > (SECONDS_MINUTE * 15):
             session_cookie = self.update(self._session_id)
             return self._session_id, session_cookie
 
@@ -42,18 +101,21 @@ class Session:
     def close(self) -> dict:
         """close session"""
         if self._session_id:
-            result = self.model.exec('session', 'get', {
+            now = int(time.time())
+            session_cache.delete(sbase64url_sha256(self._session_id))
+            model = self._model(self._session_id)
+            result = model.exec('session', 'get', {
                 "sessionId": self._session_id,
                 "open": Config.SESSION_OPEN['true'],
-                "now": NOW
+                "now": now
             })
 
             if result['success']:
-                self.model.exec('session', 'close', {
+                model.exec('session', 'close', {
                     "sessionId": self._session_id,
                     "open": Config.SESSION_OPEN['false'],
-                    "modified": NOW,
-                    "now": NOW
+                    "modified": now,
+                    "now": now
                 })
 
         return self.delete_session_cookie()
@@ -61,35 +123,50 @@ class Session:
     def create(self, user_id, ua, session_data) -> dict:
         """create_session"""
         session_token = secrets.token_urlsafe(Config.SESSION_TOKEN_LENGTH)
-        expire = NOW + Config.SESSION_IDLE_EXPIRES_SECONDS
+        now = int(time.time())
+        expire = now + Config.SESSION_IDLE_EXPIRES_SECONDS
+        model = self._model(session_token)
 
-        self.model.exec('session', 'create', {
+        model.exec('session', 'create', {
             "sessionId": session_token,
             "userId": user_id,
             "open": Config.SESSION_OPEN['true'],
             "ua": ua,
             "properties": json.dumps(session_data),
-            "modified": NOW,
-            "created": NOW,
+            "modified": now,
+            "created": now,
             "expire": expire,
         })
 
-        if self.model.has_error:
+        if model.has_error:
             return self.delete_session_cookie()
 
         return self.create_session_cookie(session_token, expire)
 
     def update(self, session_token) -> dict:
-        """update session"""
-        expire = NOW + Config.SESSION_IDLE_EXPIRES_SECONDS
-
-        self.model.exec('session', 'update', {
+        """update session
+
+        The write is queued in session_touches(), coalesced with the other touches of
+        the same session, unless SESSION_TOUCH_FLUSH_SECONDS is 0. The cookie gets
+        the new expiration at once.
+        """
+        now = int(time.time())
+        expire = now + Config.SESSION_IDLE_EXPIRES_SECONDS
+        model = self._model(session_token)
+        session_cache.delete(sbase64url_sha256(session_token))
+        params = {
             "sessionId": session_token,
-            "modified": NOW,
+            "modified": now,
             "expire": expire
-        })
+        }
+
+        if Config.SESSION_TOUCH_FLUSH_SECONDS > 0:
+            session_touches(model.db_url, model.db_type).put(params)
+            return self.create_session_cookie(session_token, expire)
+
+        model.exec('session', 'update', params)
 
-        if self.model.has_error:
+        if model.has_error:
             return self.delete_session_cookie()
 
         return self.create_session_cookie(session_token, expire)
@@ -0,0 +1,105 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Sharding of the session table across several databases.
+
+With Config.DB_SAFE_SHARDS each session is stored in the database its ID hashes
+to, each shard with its own engine and pool, so the session writes are spread
+over several SQLite write locks. Session hides the routing.
+
+Changing the list of shards moves most sessions to another shard, move them
+with reshard() ("flask --app run reshard-sessions") before using the new list.
+"""
+
+import hashlib
+from typing import Any, Dict, List
+
+from app.config import Config
+from .model import Model
+
+
+def shard_url(session_id: str, shards: List[str]) -> str:
+    """Database URL of the shard of a session ID."""
+    digest = hashlib.sha256(session_id.encode('utf-8')).digest()
+    return shards[int.from_bytes(digest[:8], 'big') % len(shards)]
+
+
+def _copy(
+    target: Model,
+    url: str,
+    pending: Dict[str, List[Dict[str, Any]]],
+    stats: Dict[str, Any],
+    moved_ids: List[Dict[str, str]]
+) -> bool:
+    """Copy the pending sessions of a target shard, see reshard().
+
+    Returns:
+        False if the copy failed, the error is set in stats
+    """
+    target.exec_many('session', 'copy', pending[url])
+    if target.has_error:
+        stats['error'] = target.last_error
+        return False
+    moved_ids.extend({"sessionId": row['sessionId']} for row in pending[url])
+    stats['moved'] += len(pending[url])
+    pending[url] = []
+    return True
+
+
+def reshard(
+    sources: List[str],
+    targets: List[str],
+    db_type: str = Config.DB_SAFE_TYPE,
+    batch_size: int = None
+) -> Dict[str, Dict[str, Any]]:
+    """Move the sessions of the source databases to their shard in the targets.
+
+    The sessions are streamed from each source and copied to their target in
+    batches, existing sessions in the target are kept. The sessions moved are
+    deleted from the source once it has been read completely, so it can be
+    run again if it is interrupted.
+
+    Args:
+        sources: URLs of the databases with sessions (the old DB_SAFE or shards)
+        targets: URLs of the new shards
+        db_type: Database type of all the databases
+        batch_size: Rows per copy and delete transaction (default: Config.DB_EXEC_MANY_CHUNK)
+
+    Returns:
+        Report by source URL: rows read, moved, deleted and error if any
+    """
+    batch_size = batch_size or Config.DB_EXEC_MANY_CHUNK
+    targets_models = {url: Model(url, db_type) for url in targets}
+    report = {}
+
+    for source in sources:
+        model = Model(source, db_type)
+        pending: Dict[str, List[Dict[str, Any]]] = {url: [] for url in targets}
+        moved_ids = []
+        stats = report[source] = {'read': 0, 'moved': 0, 'deleted': 0, 'error': None}
+
+        for row in model.exec_iter('session', 'all', batch_size=batch_size):
+            stats['read'] += 1
+            url = shard_url(row.sessionId, targets)
+            if url == source:
+                continue
+            pending[url].append(row._asdict())
+            if len(pending[url]) < batch_size:
+                continue
+            if not _copy(targets_models[url], url, pending, stats, moved_ids):
+                break
+
+        if model.has_error:
+            stats['error'] = model.last_error
+        if stats['error'] is None:
+            for url in targets:
+                if pending[url] and not _copy(targets_models[url], url, pending, stats, moved_ids):
+                    break
+
+        for start in range(0, len(moved_ids), batch_size):
+            result = model.exec_many('session', 'delete', moved_ids[start:start + batch_size])
+            if model.has_error:
+                stats['error'] = stats['error'] or model.last_error
+                break
+            stats['deleted'] += result['rowcount']
+
+    return report
@@ -0,0 +1,191 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Stateless signed sessions, selected with SESSION_BACKEND=signed.
+
+The session cookie carries the user ID, the time it was issued, its expiry and
+a random session nonce, signed with HMAC-SHA256 keyed by Config.SECRET_KEY:
+
+    userId:issued:expire:nonce:mac
+
+Session.get() validates it without reading the database. Closed sessions are
+revoked by nonce in the session_revoked table of DB_SAFE, which every process
+keeps in memory and reloads every SESSION_REVOCATION_REFRESH seconds, so a
+closed session may be accepted by other processes until the next reload.
+
+The UA and the session data given to create() are not stored.
+
+The session_revoked table (create-revoked in model/session.json) has the
+columns nonce (primary key), expire and created, it is created at startup if it
+does not exist and the expired revocations are removed by the sweeper.
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.config import Config
+from constants import * # pylint: disable=wildcard-import,unused-wildcard-import
+from utils.stats import register_stats
+from .model import Model
+from .session import Session
+
+logger = logging.getLogger(__name__)
+
+
+def sign(payload: str) -> str:
+    """Base64URL HMAC-SHA256 of a payload keyed by SECRET_KEY."""
+    digest = hmac.new(Config.SECRET_KEY.encode('utf-8'), payload.encode('utf-8'), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode('utf-8').rstrip('=')
+
+
+def create_token(user_id, issued: int, expire: int, nonce: str) -> str:
+    """Signed session token."""
+    payload = f"{user_id}:{issued}:{expire}:{nonce}"
+    return f"{payload}:{sign(payload)}"
+
+
+def parse_token(token: str) -> Optional[Tuple[str, int, int, str]]:
+    """User ID, issued, expire and nonce of a token with a valid signature, or None."""
+    try:
+        payload, mac = token.rsplit(":", 1)
+        user_id, issued, expire, nonce = payload.split(":")
+        issued, expire = int(issued), int(expire)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(mac, sign(payload)):
+        return None
+    return user_id, issued, expire, nonce
+
+
+class RevocationSet:
+    """In-memory set of the revoked session nonces, reloaded from the database.
+
+    Attributes:
+        refresh: Seconds between reloads
+    """
+
+    def __init__(self, refresh: int):
+        self.refresh = refresh
+        self._revoked: Dict[str, int] = {}
+        self._local: Dict[str, Tuple[int, float]] = {}
+        self._loaded: Optional[float] = None
+        self._lock = threading.Lock()
+        self._revoke_lock = threading.Lock()
+        self._stats = {'reloads': 0, 'errors': 0, 'revoked': 0}
+
+    def is_revoked(self, model: Model, nonce: str) -> bool:
+        """The session has been closed, reloading the set if it is stale."""
+        if self._loaded is None or time.monotonic() - self._loaded >= self.refresh:
+            self.reload(model)
+        return nonce in self._revoked
+
+    def revoke(self, model: Model, nonce: str, expire: int) -> bool:
+        """Revoke a session until it expires."""
+        with self._revoke_lock:
+            self._local[nonce] = (expire, time.monotonic())
+            self._revoked[nonce] = expire
+            self._stats['revoked'] += 1
+        model.exec('session', 'revoke', {"nonce": nonce, "expire": expire, "created": int(time.time())})
+        return not model.has_error
+
+    def reload(self, model: Model) -> None:
+        """Load the revocations not expired yet, only one thread reloads at a time."""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            result = model.exec('session', 'get-revoked', {"now": int(time.time())})
+            if model.has_error:
+                self._stats['errors'] += 1
+                return
+            # The revocations of this process are kept until the reloads surely include them,
+            # merged with the swap so a revoke() during the reload is not lost
+            revoked = {row[0]: row[1] for row in result['rows']}
+            oldest = time.monotonic() - 2 * self.refresh
+            with self._revoke_lock:
+                for nonce, (expire, revoked_at) in list(self._local.items()):
+                    if revoked_at < oldest:
+                        self._local.pop(nonce, None)
+                    else:
+                        revoked[nonce] = expire
+                self._revoked = revoked
+            self._stats['reloads'] += 1
+        finally:
+            self._loaded = time.monotonic()
+            self._lock.release()
+
+    def stats(self) -> dict:
+        """Counters and size of the set."""
+        return {**self._stats, 'size': len(self._revoked)}
+
+
+def create_revocation_table() -> bool:
+    """Create the session_revoked table in DB_SAFE if it does not exist."""
+    model = Model(Config.DB_SAFE, Config.DB_SAFE_TYPE)
+    model.exec('session', 'create-revoked')
+    if model.has_error:
+        logger.error("Can not create the session_revoked table: %s", model.last_error)
+        return False
+    return True
+
+
+revocations = RevocationSet(Config.SESSION_REVOCATION_REFRESH)
+
+register_stats('session_revocations', revocations.stats)
+
+
+class SignedSession(Session):
+    """Session backend with signed cookies, see the module documentation."""
+
+    def get(self) -> tuple[str | None, dict]:
+        """get session"""
+        if not self._session_id:
+            return None, {}
+
+        token = parse_token(self._session_id)
+        if token is None:
+            return None, {}
+
+        now = int(time.time())
+        user_id, issued, expire, nonce = token
+        if expire <= now or revocations.is_revoked(self.model, nonce):
+            return None, {}
+
+        # Issue a new expiry if issued more than 15 minutes ago
+        if (now - issued) > (SECONDS_MINUTE * 15):
+            expire = now + Config.SESSION_IDLE_EXPIRES_SECONDS
+            session_token = create_token(user_id, now, expire, nonce)
+            return session_token, self.create_session_cookie(session_token, expire)
+
+        return self._session_id, self.create_session_cookie(self._session_id, expire)
+
+    def close(self) -> dict:
+        """close session"""
+        token = parse_token(self._session_id) if self._session_id else None
+        if token:
+            # Any token of the session expires before the last one that can be issued now
+            revocations.revoke(self.model, token[3], int(time.time()) + Config.SESSION_IDLE_EXPIRES_SECONDS)
+
+        return self.delete_session_cookie()
+
+    def create(self, user_id, ua, session_data) -> dict:
+        """create_session"""
+        now = int(time.time())
+        expire = now + Config.SESSION_IDLE_EXPIRES_SECONDS
+        nonce = secrets.token_urlsafe(Config.SESSION_TOKEN_LENGTH)
+        session_token = create_token(user_id, now, expire, nonce)
+        return self.create_session_cookie(session_token, expire)
+
+    def update(self, session_token) -> dict:
+        """update session"""
+        token = parse_token(session_token)
+        if token is None:
+            return self.delete_session_cookie()
+
+        now = int(time.time())
+        expire = now + Config.SESSION_IDLE_EXPIRES_SECONDS
+        return self.create_session_cookie(create_token(token[0], now, expire, token[3]), expire)
@@ -0,0 +1,132 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Sweeper of expired and closed sessions and expired pins.
+
+Rows are deleted in batches of Config.SWEEP_BATCH, each batch in its own short
+transaction with a pause between them, so the sweep never holds the database
+(the SQLite write lock) for long.
+
+It runs with "flask --app run sweep" or in-process every Config.SWEEP_INTERVAL
+seconds, with a random jitter so several processes do not sweep in lockstep.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.config import Config
+from utils.stats import register_stats
+from .model import Model
+
+logger = logging.getLogger(__name__)
+
+
+class Sweeper:
+    """Batched deletion of the expired rows.
+
+    Attributes:
+        batch_size: Rows deleted per transaction
+        pause: Seconds to wait between batches
+    """
+
+    def __init__(self, batch_size: int, pause_ms: int):
+        self.batch_size = max(1, batch_size)
+        self.pause = pause_ms / 1000
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._last: Dict[str, Any] = {}
+        self._totals = {'runs': 0, 'deleted': 0, 'seconds': 0.0}
+
+    def tasks(self, now: int) -> Dict[str, tuple]:
+        """Statements to run until they delete less than a batch: (model, name, key, params)."""
+        tasks = {}
+        for shard, db_url in enumerate(Config.DB_SAFE_SHARDS or [Config.DB_SAFE]):
+            tasks[f"session/sweep@{shard}" if Config.DB_SAFE_SHARDS else 'session/sweep'] = (
+                Model(db_url, Config.DB_SAFE_TYPE), 'session', 'sweep',
+                {"now": now, "closed": Config.SESSION_OPEN['false']}
+            )
+        tasks['user/sweep-pins'] = (
+            Model(Config.DB_PWA, Config.DB_PWA_TYPE), 'user', 'sweep-pins',
+            {"now": now}
+        )
+        if Config.SESSION_BACKEND == 'signed':
+            tasks['session/sweep-revoked'] = (
+                Model(Config.DB_SAFE, Config.DB_SAFE_TYPE), 'session', 'sweep-revoked',
+                {"now": now}
+            )
+        return tasks
+
+    def run_once(self) -> Dict[str, Dict[str, Any]]:
+        """Sweep all the tables once.
+
+        Returns:
+            Report by task: rows deleted, batches, seconds spent and error if any
+        """
+        report = {}
+        for task, (model, name, key, params) in self.tasks(int(time.time())).items():
+            start = time.perf_counter()
+            deleted = batches = 0
+            while not self._stop.is_set():
+                result = model.exec(name, key, {**params, "limit": self.batch_size})
+                if model.has_error:
+                    break
+                batches += 1
+                deleted += max(result['rowcount'], 0)
+                if result['rowcount'] < self.batch_size:
+                    break
+                time.sleep(self.pause)
+
+            report[task] = {
+                'deleted': deleted,
+                'batches': batches,
+                'seconds': round(time.perf_counter() - start, 3),
+                'error': model.last_error
+            }
+            if model.has_error:
+                logger.error("Sweep %s failed: %s", task, model.last_error)
+
+        with self._lock:
+            self._last = report
+            self._totals['runs'] += 1
+            self._totals['deleted'] += sum(res['deleted'] for res in report.values())
+            self._totals['seconds'] += sum(res['seconds'] for res in report.values())
+        return report
+
+    def start(self, interval: int, jitter: float = 0.0) -> None:
+        """Run the sweep in a daemon thread every interval seconds +- jitter (fraction)."""
+        if interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval * (1 + random.uniform(-jitter, jitter))):
+                try:
+                    report = self.run_once()
+                    logger.info("Sweep: %s", report)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Sweep failed")
+
+        self._thread = threading.Thread(target=run, name="sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the periodic sweep, a batch in progress is finished."""
+        self._stop.set()
+
+    def stats(self) -> dict:
+        """Totals and report of the last run."""
+        with self._lock:
+            return {
+                **self._totals,
+                'seconds': round(self._totals['seconds'], 3),
+                'running': bool(self._thread and self._thread.is_alive()),
+                'last': self._last
+            }
+
+
+sweeper = Sweeper(Config.SWEEP_BATCH, Config.SWEEP_PAUSE_MS)
+
+register_stats('sweeper', sweeper.stats)
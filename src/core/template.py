@@ -2,7 +2,6 @@
 
 """template and response"""
 
-import json
 import re
 
 from flask import Response, current_app, make_response
@@ -34,7 +33,7 @@ class Template:
         """render template and return response"""
         tpl = tpl or self.data['TEMPLATE_LAYOUT']
 
-        template = NeutralTemplate(tpl, json.dumps(self.schema.properties))
+        template = NeutralTemplate(tpl, current_app.components.schema_json.dumps(self.schema.properties))
         self.contents = template.render()
 
         self.contents = self.contents.lstrip('\n\r\t ')
@@ -84,7 +83,7 @@ class Template:
         }
 
         template = NeutralTemplate(
-            self.data['TEMPLATE_ERROR'], json.dumps(self.schema.properties)
+            self.data['TEMPLATE_ERROR'], current_app.components.schema_json.dumps(self.schema.properties)
         )
         self.contents = template.render()
 
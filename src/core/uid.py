@@ -0,0 +1,112 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Block allocator of unique identifiers.
+
+The identifiers are reserved in the uid table in blocks, with a single
+transaction per block, and handed out from an in-process pool. The uid table
+keeps guaranteeing that an identifier is unique across all the database tables
+and processes, a reserved identifier that is never used is simply lost.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from app.config import Config
+
+
+class UidAllocator:
+    """Thread-safe pools of reserved identifiers per database and target.
+
+    Attributes:
+        block_size: Identifiers reserved per transaction
+        low_watermark: Pool size that triggers a refill in the background
+    """
+
+    def __init__(self, block_size: int, low_watermark: int):
+        self.block_size = max(1, block_size)
+        self.low_watermark = min(low_watermark, self.block_size - 1)
+        self._pools: Dict[Tuple[str, str], deque] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._refilling: set = set()
+        self._lock = threading.Lock()
+
+    def next(self, model, target: str, attempts: int = 10) -> Optional[int]:
+        """Get a reserved identifier for a target.
+
+        Args:
+            model: Model of the database where the uid table is
+            target: The target table or entity type for which the UID is being created
+            attempts: Maximum number of candidate rounds when a block is reserved
+
+        Returns:
+            int: A unique identifier or None if the reservation failed (check model.has_error)
+        """
+        key = (model.db_url, target)
+        pool, lock = self._get_pool(key)
+
+        while True:
+            try:
+                uid = pool.popleft()
+            except IndexError:
+                with lock:
+                    if not pool and not self._refill(model, pool, target, attempts):
+                        return None
+                continue
+
+            if len(pool) <= self.low_watermark:
+                self._refill_background(model, key, attempts)
+            return uid
+
+    def reset(self) -> None:
+        """Forget all the reserved identifiers."""
+        with self._lock:
+            self._pools.clear()
+            self._locks.clear()
+            self._refilling.clear()
+
+    def _get_pool(self, key: Tuple[str, str]) -> Tuple[deque, threading.Lock]:
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = deque()
+                self._locks[key] = threading.Lock()
+            return self._pools[key], self._locks[key]
+
+    def _refill(self, model, pool: deque, target: str, attempts: int) -> bool:
+        uids = model.reserve_uids(target, self.block_size, attempts)
+        if not uids:
+            return False
+        pool.extend(uids)
+        return True
+
+    def _refill_background(self, model, key: Tuple[str, str], attempts: int) -> None:
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+
+        def refill():
+            try:
+                pool, lock = self._get_pool(key)
+                with lock:
+                    if len(pool) <= self.low_watermark:
+                        self._refill(type(model)(model.db_url, model.db_type), pool, key[1], attempts)
+            finally:
+                with self._lock:
+                    self._refilling.discard(key)
+
+        threading.Thread(target=refill, name=f"uid-refill-{key[1]}", daemon=True).start()
+
+
+uid_allocator = UidAllocator(Config.UID_BLOCK_SIZE, Config.UID_LOW_WATERMARK)
+
+
+def _after_fork_in_child() -> None:
+    """The child must not hand out the identifiers reserved by the parent."""
+    uid_allocator._lock = threading.Lock()  # pylint: disable=protected-access
+    uid_allocator.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
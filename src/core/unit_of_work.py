@@ -0,0 +1,137 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Request-scoped unit of work shared by all the models of a request.
+
+Dispatcher opens the unit of work and the app closes it on teardown. Every
+Model.exec() of the request then reuses one connection per database, checked
+out on first use, instead of checking out a connection per query.
+
+With Config.DB_BATCH_WRITES the writes of the request are not committed one by
+one but all together when the request ends, and rolled back if the request
+fails. Each Model.exec() runs in a SAVEPOINT, a failed statement only rolls
+back its own block, the Model reports the error and the request decides. On
+SQLite the database stays locked for other writers from the first write until
+the request ends.
+
+Model.exec_iter() and the uid reservations keep using their own connections.
+
+After a write, the unit of work pins the reads of that database to the primary
+for the rest of the request, so the request reads its own writes even when the
+database has read replicas.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from flask import g, has_app_context
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import Config
+from .model_cache import query_cache
+
+# Errors Model catches and reports with has_error, the caller handles them
+HANDLED_ERRORS = (SQLAlchemyError, TypeError, ValueError)
+
+
+class UnitOfWork:
+    """Connections and pending writes of a request.
+
+    Attributes:
+        batch_writes: Commit all the writes together when the unit of work is closed
+        failed: An error nobody handles, the batched writes will be rolled back
+    """
+
+    def __init__(self, batch_writes: bool = False):
+        self.batch_writes = batch_writes
+        self.failed = False
+        self._connections: Dict[Engine, Connection] = {}
+        self._written: Set[Tuple[str, str]] = set()
+        self._pinned: Set[str] = set()
+
+    @property
+    def dirty(self) -> bool:
+        """There are batched writes not committed yet."""
+        return bool(self._written)
+
+    @contextmanager
+    def begin(self, engine: Engine) -> Iterator[Connection]:
+        """Connection of the request for an engine, inside a transaction.
+
+        Without batch_writes each block is its own transaction, committed when the
+        block ends, as engine.begin() does. With batch_writes all the blocks share
+        the transaction of the request, each block in a SAVEPOINT rolled back if
+        the block fails.
+        """
+        conn = self._connections.get(engine)
+        if conn is None:
+            conn = self._connections[engine] = engine.connect()
+
+        if not self.batch_writes:
+            with conn.begin():
+                yield conn
+            return
+
+        if not conn.in_transaction():
+            conn.begin()
+        try:
+            with conn.begin_nested():
+                yield conn
+        except HANDLED_ERRORS:
+            raise
+        except Exception:
+            self.failed = True
+            raise
+
+    def pin(self, db_url: str) -> None:
+        """Send the reads of a database to the primary for the rest of the request."""
+        self._pinned.add(db_url)
+
+    def is_pinned(self, db_url: str) -> bool:
+        """The reads of a database go to the primary."""
+        return db_url in self._pinned
+
+    def written(self, db_url: str, tables) -> None:
+        """Track the tables written in a batch to invalidate the query cache on commit."""
+        self._written.update((db_url, table) for table in tables)
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """Commit or roll back the batched writes and return the connections to the pool."""
+        commit = not (error or self.failed)
+        try:
+            for conn in self._connections.values():
+                try:
+                    if conn.in_transaction():
+                        if commit:
+                            conn.commit()
+                        else:
+                            conn.rollback()
+                finally:
+                    conn.close()
+        finally:
+            for db_url, table in self._written:
+                query_cache.invalidate(db_url, (table,))
+            self._connections.clear()
+            self._written.clear()
+            self._pinned.clear()
+
+
+def open_unit_of_work() -> UnitOfWork:
+    """Open the unit of work of the current request, the connections are checked out lazily."""
+    if 'unit_of_work' not in g:
+        g.unit_of_work = UnitOfWork(Config.DB_BATCH_WRITES)
+    return g.unit_of_work
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Unit of work of the current request or None."""
+    if not has_app_context():
+        return None
+    return g.get('unit_of_work')
+
+
+def close_unit_of_work(error: Optional[BaseException] = None) -> None:
+    """Close the unit of work of the current request, registered as app teardown."""
+    uow = g.pop('unit_of_work', None)
+    if uow is not None:
+        uow.close(error)
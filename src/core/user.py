@@ -2,16 +2,48 @@
 
 """Module for handling user operations"""
 
+import logging
 import random
+import threading
+import time
 from datetime import datetime, timezone
 # import json
-import bcrypt
 from constants import * # pylint: disable=wildcard-import,unused-wildcard-import
 from utils.sbase64url import sbase64url_sha256, sbase64url_md5, sbase64url_token
 from app.config import Config
+from .bcrypt_pool import bcrypt_pool, BcryptBusyError
+from .login_filter import login_filter
 from .model import Model
 # import pprint
 
+logger = logging.getLogger(__name__)
+
+# Hash of no password by cost, checked for unknown logins so they take as long as the known ones
+_dummy_hashes = {}
+
+# Rehashes running in the background, more logins with an outdated cost wait for the next login
+_rehash_slots = threading.BoundedSemaphore(2)
+
+
+def _rehash(db_url, db_type, user_id, password: bytes, old: bytes) -> None:
+    """Hash the password with the current cost and store it if it has not changed meanwhile."""
+    try:
+        model = Model(db_url, db_type)
+        model.exec('user', 'update-password', {
+            "userId": user_id,
+            "password": bcrypt_pool.hashpw(password),
+            "old": old,
+            "modified": int(time.time())
+        })
+        if model.has_error:
+            logger.error("Password rehash of user %s failed: %s", user_id, model.last_error)
+    except BcryptBusyError:
+        pass
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Password rehash of user %s failed", user_id)
+    finally:
+        _rehash_slots.release()
+
 
 class User:
     """User creation and authentication handler"""
@@ -20,18 +52,20 @@ class User:
         """Initialize the User class with a database connection."""
         self.model = Model(db_url, db_type)
 
-    def _build_user_params(self, user_id, login, data):
+    def _build_user_params(self, user_id, login, password, data):
+        now = int(time.time())
         return {
             "userId": user_id,
             "login": login,
-            "password": self.hash_password(data['password']),
+            "password": password,
             "birthdate": self.hash_birthdate(data['birthdate']),
-            "lasttime": NOW,
-            "created": NOW,
-            "modified": NOW
+            "lasttime": now,
+            "created": now,
+            "modified": now
         }
 
     def _build_user_profile_params(self, profile_id, user_id, data):
+        now = int(time.time())
         return {
             "profileId": profile_id,
             "userId": user_id,
@@ -39,35 +73,38 @@ class User:
             "locale": data['locale'],
             "alias": data['alias'].strip(),
             "properties": data['properties'].strip() if 'properties' in data else "{}",
-            "lasttime": NOW,
-            "created": NOW,
-            "modified": NOW
+            "lasttime": now,
+            "created": now,
+            "modified": now
         }
 
     def _build_user_email_params(self, user_id, data):
+        now = int(time.time())
         return {
             "email": data['email'].strip(),
             "userId": user_id,
             "main": Config.MAIN_EMAIL['true'],
-            "created": NOW
+            "created": now
         }
 
     def _build_user_disabled_params(self, user_id, reason):
+        now = int(time.time())
         return {
             "userId": user_id,
             "reason": reason,
-            "created": NOW,
-            "modified": NOW
+            "created": now,
+            "modified": now
         }
 
     def _build_user_pin_params(self, target, user_id):
+        now = int(time.time())
         return {
             "target": target,
             "userId": user_id,
             "pin": random.randint(Config.PIN_MIN, Config.PIN_MAX),
             "token": sbase64url_token(Config.TOKEN_LENGTH),
-            "created": NOW,
-            "expires": NOW + Config.PIN_EXPIRES_SECONDS
+            "created": now,
+            "expires": now + Config.PIN_EXPIRES_SECONDS
         }
 
     def create(self, data) -> dict:
@@ -85,18 +122,16 @@ class User:
 
         login = self.hash_login(data['email'].strip())
 
-        # Check if user already exists
-        exists = self.model.exec('user', 'check-exists', {"login": login})
-        if self.model.has_error:
-            return self.model.get_last_error()
-        if exists['rows'][0][0]:
+        try:
+            password = self.hash_password(data['password'])
+        except BcryptBusyError:
             return {
                 'success': False,
-                'error': USER_EXISTS,
-                'message': 'User already exists'
+                'error': BUSY,
+                'message': 'Server busy, please try again later'
             }
 
-        # Create user and profile IDs
+        # Create user and profile IDs, already reserved in the uid table by the allocator
         user_id = self.model.create_uid('user')
         if self.model.has_error:
             return self.model.get_last_error()
@@ -107,28 +142,49 @@ class User:
         target = str(Config.DISABLED[UNCONFIRMED])
         pin_params = self._build_user_pin_params(target, user_id)
 
-        # Create user, profile, email, disabled and disabled_unvalidated records
-        result = self.model.exec('user', 'create', [
-            self._build_user_params(user_id, login, data),
+        # Create user, profile, email, disabled and, with VALIDATE_SIGNUP, disabled_unvalidated
+        # records in a single transaction, an existing login fails on its unique constraint
+        params = [
+            self._build_user_params(user_id, login, password, data),
             self._build_user_profile_params(profile_id, user_id, data),
             self._build_user_email_params(user_id, data),
             self._build_user_disabled_params(user_id, Config.DISABLED[UNCONFIRMED]),
-            self._build_user_disabled_params(user_id, Config.DISABLED[UNVALIDATED]),
+            {
+                **self._build_user_disabled_params(user_id, Config.DISABLED[UNVALIDATED]),
+                "insert": 1 if Config.VALIDATE_SIGNUP else 0
+            },
             pin_params
-        ])
+        ]
+        result = self.model.exec('user', 'create', params)
+
+        if self.model.error_code == 'CONSTRAINT_ERROR':
+            error = self.model.get_last_error()
+            exists = self.model.exec('user', 'check-exists', {"login": login})
+            if self.model.has_error:
+                return self.model.get_last_error()
+            if exists['rows'][0][0]:
+                return {
+                    'success': False,
+                    'error': USER_EXISTS,
+                    'message': 'User already exists'
+                }
+            return error
 
         if self.model.has_error:
             return self.model.get_last_error()
 
-        if not result or not all(r.get('success') for r in result):
+        # The statements with the insert flag unset insert nothing
+        if not result or not all(
+            res.get('success') or not params[res['statement_index']].get('insert', 1) for res in result
+        ):
             return {
                 'success': False,
                 'error': 'CREATION_INCOMPLETE',
                 'message': 'Failed to create user. Please contact administrator.'
             }
 
-        if not Config.VALIDATE_SIGNUP:
-            self.model.exec('user', 'delete-disabled', {"reason": Config.DISABLED[UNVALIDATED], "userId": user_id})
+        if Config.LOGIN_FILTER:
+            login_filter.add(login)
 
         return {
             'success': True,
@@ -144,8 +200,28 @@ class User:
         return sbase64url_sha256(email)
 
     def hash_password(self, password: str) -> bytes:
-        """Hash the password using bcrypt."""
-        return bcrypt.hashpw(password.strip().encode('utf-8'), bcrypt.gensalt())
+        """Hash the password using bcrypt, in the bcrypt pool.
+
+        Raises:
+            BcryptBusyError: The pool queue is full, retryable
+        """
+        return bcrypt_pool.hashpw(password.strip().encode('utf-8'))
+
+    def rehash_later(self, user_id, password: bytes, hashed: bytes) -> bool:
+        """Rehash in the background a verified password whose cost is not the current one.
+
+        Returns:
+            True if a rehash has been started
+        """
+        if int(hashed[4:6]) == bcrypt_pool.rounds or not _rehash_slots.acquire(blocking=False):
+            return False
+        threading.Thread(
+            target=_rehash,
+            args=(self.model.db_url, self.model.db_type, user_id, password, hashed),
+            name="bcrypt-rehash",
+            daemon=True
+        ).start()
+        return True
 
     def hash_birthdate(self, birthdate: str) -> str:
         """Obfuscate the birthdate as a base64url md5 hash of its UTC timestamp."""
@@ -154,56 +230,78 @@ class User:
         return sbase64url_md5(str(ts))
 
     def check_login(self, login, password, pin) -> dict | None:
-        """Validates user credentials and returns user data if valid"""
+        """Validates user credentials and returns user data if valid
+
+        Raises:
+            BcryptBusyError: The bcrypt pool queue is full, answered with 503 by the app
+        """
 
         # Blank login or password
         if not login or not password:
             return None
 
         login_b64 = self.hash_login(login)
-        result = self.model.exec('user', 'get-by-login', {"login": login_b64})
+
+        # The user surely does not exist, without querying the database
+        if Config.LOGIN_FILTER and not login_filter.might_exist(login_b64):
+            self._dummy_check(password)
+            return None
+
+        result = self.model.exec('user', 'get-by-login', {"login": login_b64}, compact=True)
 
         # The user does not exist in the database
         if not (result and result['rows'] and result['rows'][0] and result['rows'][0][2]):
+            self._dummy_check(password)
             return None
 
-        columns = list(dict.fromkeys(result['columns']))
-        user_data_list = [dict(zip(columns, row)) for row in result['rows']]
+        user_row = result['rows'][0]
 
         # Check user password
-        if not bcrypt.checkpw(password.encode('utf-8'), user_data_list[0]['password']):
+        if not bcrypt_pool.checkpw(password.encode('utf-8'), user_row.password):
             return None
 
+        self.rehash_later(user_row.userId, password.encode('utf-8'), user_row.password)
+
         unconfirmed = Config.DISABLED[UNCONFIRMED]
         user_data = {
-            'userId': user_data_list[0]['userId'],
-            'birthdate': user_data_list[0]['birthdate'],
-            'created': user_data_list[0]['created'],
-            'lasttime': user_data_list[0]['lasttime'],
-            'modified': user_data_list[0]['modified'],
+            'userId': user_row.userId,
+            'birthdate': user_row.birthdate,
+            'created': user_row.created,
+            'lasttime': user_row.lasttime,
+            'modified': user_row.modified,
             "user_disabled": {}
         }
 
-        for row in user_data_list:
+        for row in result['rows']:
             if row['user_disabled.reason']:
                 key = str(row['user_disabled.reason'])
                 user_data['user_disabled'][Config.DISABLED_KEY[key]] = key
                 if pin and row['user_disabled.reason'] == unconfirmed:
-                    target = str(user_data_list[0]['userId']) + '_' + str(unconfirmed)
-                    result_pin = self.model.exec('user', 'get-pin', {"target": target, "pin": pin, "now": NOW})
-                    if result_pin and result_pin['rows'] and result_pin['rows'][0] and result_pin['rows'][0][0]:
-                        self.model.exec('user', 'delete-disabled', {
-                            "reason": unconfirmed, "userId": user_data_list[0]['userId']
-                        })
-                        self.model.exec('user', 'delete-pin', {"target": target, "userId": user_data_list[0]['userId'], "pin": pin})
+                    # Check and consume the pin created by create() and confirm the user in one transaction
+                    params = {
+                        "reason": unconfirmed,
+                        "target": str(unconfirmed),
+                        "userId": user_row.userId,
+                        "pin": pin,
+                        "now": int(time.time())
+                    }
+                    result_pin = self.model.exec('user', 'confirm-pin', [params, params])
+                    if result_pin and result_pin[0]['rowcount'] > 0:
                         user_data['user_disabled'].pop(Config.DISABLED_KEY[key])
 
         return user_data
 
+    def _dummy_check(self, password: str) -> None:
+        """Check the password against a dummy hash, an unknown login takes as long as a wrong password."""
+        rounds = bcrypt_pool.rounds
+        if rounds not in _dummy_hashes:
+            _dummy_hashes[rounds] = bcrypt_pool.hashpw(b'')
+        bcrypt_pool.checkpw(password.encode('utf-8'), _dummy_hashes[rounds])
+
     def get_user(self, login):
         """Retrieve user data based on login."""
         login_b64 = self.hash_login(login)
-        result = self.model.exec('user', 'get-by-login', {"login": login_b64})
+        result = self.model.exec('user', 'get-by-login', {"login": login_b64}, compact=True)
 
         if self.model.has_error:
             return self.model.get_last_error()
@@ -216,9 +314,7 @@ class User:
                 'user_data': {}
             }
 
-        columns = list(dict.fromkeys(result['columns']))
-        row = result['rows'][0]
-        user_row = dict(zip(columns, row))
+        user_row = result['rows'][0]
 
         return {
             'success': True,
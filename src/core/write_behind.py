@@ -0,0 +1,121 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""In-process write-behind buffer for idempotent updates.
+
+The rows are queued by id, a newer row for the same id replaces the queued one,
+and written with Model.exec_many() in a single transaction by a background
+thread every flush_interval seconds, when max_entries are queued and when the
+process exits. A failed flush keeps the rows queued for the next one.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from utils.stats import register_stats
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Coalescing buffer of the rows of one model statement.
+
+    Attributes:
+        name: Model file name of the statement
+        key: Key of the statement, a single UPDATE
+        id_field: Row field that identifies the rows to coalesce
+        flush_interval: Seconds between flushes
+        max_entries: Queued rows that trigger a flush
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Any],
+        name: str,
+        key: str,
+        id_field: str,
+        flush_interval: float,
+        max_entries: int,
+        label: str = None
+    ):
+        self.model_factory = model_factory
+        self.name = name
+        self.key = key
+        self.id_field = id_field
+        self.flush_interval = flush_interval
+        self.max_entries = max(1, max_entries)
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'queued': 0, 'flushed': 0, 'flushes': 0, 'errors': 0}
+
+        register_stats(f"write_behind:{label or f'{name}/{key}'}", self.stats)
+        atexit.register(self.flush)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork_in_child)
+
+    def put(self, row: Dict[str, Any]) -> None:
+        """Queue a row, replacing the one queued with the same id."""
+        with self._lock:
+            self._pending[row[self.id_field]] = row
+            self._stats['queued'] += 1
+            full = len(self._pending) >= self.max_entries
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.key}", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write the queued rows in one transaction.
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, {}
+            if not rows:
+                return 0
+
+            model = self.model_factory()
+            model.exec_many(self.name, self.key, list(rows.values()))
+            with self._lock:
+                if model.has_error:
+                    self._stats['errors'] += 1
+                    for row_id, row in rows.items():
+                        self._pending.setdefault(row_id, row)
+                else:
+                    self._stats['flushes'] += 1
+                    self._stats['flushed'] += len(rows)
+
+        if model.has_error:
+            logger.error("Write-behind %s/%s failed: %s", self.name, self.key, model.last_error)
+            return 0
+        return len(rows)
+
+    def stats(self) -> dict:
+        """Counters and rows pending."""
+        with self._lock:
+            return {**self._stats, 'pending': len(self._pending)}
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Write-behind %s/%s failed", self.name, self.key)
+
+    def _after_fork_in_child(self) -> None:
+        """The parent writes its own queued rows, the child starts empty without a thread."""
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = {}
+        self._thread = None
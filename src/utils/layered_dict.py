@@ -0,0 +1,164 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Copy-on-access layer over a shared nested dictionary.
+
+LayeredDict(base) starts as a shallow copy of base. A nested dict or list is
+copied the first time it is read with [], get(), setdefault() or pop(), so
+writes through any path of keys only change the layer and base stays shared
+and untouched, copying just the branches a caller actually uses.
+
+items(), values() and iteration return the stored values as they are, so
+json.dumps() serializes the layer without copying it; the values not read with
+[] yet belong to base and must not be modified through them.
+
+BaseJson serializes a layer reusing the JSON of the branches of base it has not
+copied, with the same output as json.dumps().
+"""
+
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Dict
+
+
+def _encode_scalar(value: Any) -> str:
+    """json.dumps() of a value, without its overhead for the common scalars."""
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if type(value) is int:  # pylint: disable=unidiomatic-typecheck
+        return int.__repr__(value)
+    return json.dumps(value)
+
+
+def _encode_key(key: Any) -> str:
+    """JSON of a dict key, converted to a string as json.dumps() does."""
+    if isinstance(key, str):
+        return encode_basestring_ascii(key)
+    return json.dumps({key: 0})[1:-4]
+
+
+def _layer(value: Any) -> Any:
+    """Private copy of a container value of the base."""
+    if isinstance(value, dict):
+        return LayeredDict(value)
+    if isinstance(value, list):
+        return [_layer(item) for item in value]
+    return value
+
+
+class LayeredDict(dict):
+    """Dict whose nested containers are copied from base the first time they are read."""
+
+    __slots__ = ('_own',)
+
+    def __init__(self, base=()):
+        super().__init__(base)
+        self._own = set()
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if key not in self._own:
+            self._own.add(key)
+            if isinstance(value, (dict, list)):
+                value = _layer(value)
+                dict.__setitem__(self, key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        self._own.add(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._own.discard(key)
+        dict.__delitem__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key not in self:
+            return dict.pop(self, key, *default)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        self._own.clear()
+        dict.clear(self)
+
+    def copy(self):
+        return LayeredDict(self)
+
+    def __reduce__(self):
+        return LayeredDict, (dict(self),)
+
+
+class BaseJson:
+    """JSON of the layers of an immutable base, with the branches of base serialized once.
+
+    The containers of base are recognized by identity, so base must not change
+    after this is created.
+    """
+
+    def __init__(self, base: dict):
+        self._base: Dict[int, Any] = {}
+        self._json: Dict[int, str] = {}
+        self.hits = 0
+        self.misses = 0
+        stack = [base]
+        while stack:
+            value = stack.pop()
+            self._base[id(value)] = value
+            stack.extend(item for item in (value.values() if isinstance(value, dict) else value)
+                         if isinstance(item, (dict, list)))
+
+    def dumps(self, value: Any) -> str:
+        """Same as json.dumps(value)."""
+        if self._base.get(id(value)) is value:
+            cached = self._json.get(id(value))
+            if cached is None:
+                self.misses += 1
+                cached = self._json[id(value)] = json.dumps(value)
+            else:
+                self.hits += 1
+            return cached
+
+        if isinstance(value, LayeredDict):
+            if not value:
+                return '{}'
+            return '{' + ', '.join(
+                f"{_encode_key(key)}: {self.dumps(item)}" for key, item in value.items()
+            ) + '}'
+
+        if isinstance(value, list):
+            if not value:
+                return '[]'
+            return '[' + ', '.join(self.dumps(item) for item in value) + ']'
+
+        return _encode_scalar(value)
+
+    def stats(self) -> dict:
+        """Branches of base reused and serialized."""
+        return {'hits': self.hits, 'misses': self.misses, 'fragments': len(self._json)}
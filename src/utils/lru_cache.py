@@ -0,0 +1,101 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Thread-safe bounded LRU cache with optional TTL and hit/miss counters."""
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded least recently used cache.
+
+    Attributes:
+        maxsize: Maximum number of entries, the least recently used are evicted
+        ttl: Default seconds an entry is valid, None for no expiration
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Get a value and mark it as recently used, default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires, value = entry
+            if expires is not None and expires <= time.monotonic():
+                self.expirations += 1
+                self.misses += 1
+                self._remove(key)
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None) -> None:
+        """Set a value, evicting the least recently used entries if full."""
+        if self.maxsize <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires, value)
+            while len(self._data) > self.maxsize:
+                self.evictions += 1
+                self._remove(next(iter(self._data)))
+
+    def delete(self, key) -> bool:
+        """Delete a key, True if it was in the cache."""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+                return True
+            return False
+
+    def clear(self) -> None:
+        """Delete all the entries, the counters are kept."""
+        with self._lock:
+            for key in list(self._data):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        """Size, counters and hit ratio of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def _remove(self, key) -> None:
+        """Remove an entry, subclasses can extend it to keep their indexes in sync."""
+        del self._data[key]
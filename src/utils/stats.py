@@ -0,0 +1,72 @@
+# Copyright (C) 2025 https://github.com/FranBarInstance/nts-starter-py (See LICENCE)
+
+"""Registry of the runtime statistics exposed for debugging and tuning."""
+
+import json
+import os
+import signal
+import sys
+import threading
+from typing import Callable, Dict, Optional
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+# Set by the signal handler, the dump runs in the _dumper thread
+_dump_requested = threading.Event()
+_dumper: Optional[threading.Thread] = None
+
+
+def register_stats(name: str, provider: Callable[[], dict]) -> None:
+    """Register a function that returns the current statistics of a subsystem."""
+    _providers[name] = provider
+
+
+def collect_stats() -> dict:
+    """Statistics of all the registered subsystems."""
+    return {name: provider() for name, provider in _providers.items()}
+
+
+def dump_stats(*_args) -> None:
+    """Write the statistics as JSON to stderr."""
+    print(json.dumps(collect_stats(), indent=2, default=str), file=sys.stderr, flush=True)
+
+
+def install_stats_signal(signum: int) -> None:
+    """Dump the statistics to stderr when the process receives signum.
+
+    The statistics providers take locks that the interrupted main thread may
+    hold, so the handler only wakes up a thread that does the dump. Must be
+    called from the main thread.
+    """
+    signal.signal(signum, _request_dump)
+    _start_dumper()
+
+
+def _request_dump(*_args) -> None:
+    _dump_requested.set()
+
+
+def _start_dumper() -> None:
+    global _dumper  # pylint: disable=global-statement
+    _dumper = threading.Thread(target=_dump_loop, name="stats-dump", daemon=True)
+    _dumper.start()
+
+
+def _dump_loop() -> None:
+    requested = _dump_requested
+    while True:
+        requested.wait()
+        requested.clear()
+        dump_stats()
+
+
+def _after_fork_in_child() -> None:
+    """The dump thread of the parent, and maybe the lock of its event, are not in the child."""
+    global _dump_requested  # pylint: disable=global-statement
+    _dump_requested = threading.Event()
+    if _dumper is not None:
+        _start_dumper()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)